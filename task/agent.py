@@ -1,16 +1,46 @@
 import asyncio
 import json
+import time
+from dataclasses import dataclass
 from typing import Any
 
 from aidial_client import AsyncDial
 from aidial_client.types.chat.legacy.chat_completion import CustomContent, ToolCall
 from aidial_sdk.chat_completion import Message, Role, Choice, Request, Response
+from pydantic import StrictStr
 
 from task.tools.base import BaseTool
 from task.tools.models import ToolCallParams
+from task.tools.tool_result_cache import ToolResultCache
+from task.tools.tool_scheduler import ToolScheduler
 from task.utils.constants import TOOL_CALL_HISTORY_KEY
 from task.utils.history import unpack_messages
+from task.utils.history_compaction import HistoryCompactor
+from task.utils.http_client_pool import HttpClientPool
 from task.utils.stage import StageProcessor
+from task.utils.state_store import ConversationStateRepository
+
+
+@dataclass
+class AgentBudget:
+    """
+    Limits of one user request:
+    - `max_steps`: number of orchestration model calls
+    - `max_tokens`: cumulative tokens of all orchestration model calls (None - unlimited)
+    - `max_seconds`: wall-clock deadline of the whole request (None - unlimited)
+    """
+    max_steps: int = 10
+    max_tokens: int | None = None
+    max_seconds: float | None = None
+
+
+@dataclass
+class StepTiming:
+    step: int
+    llm_seconds: float
+    tools_seconds: float
+    tool_calls: int
+    tokens: int
 
 
 class GeneralPurposeAgent:
@@ -20,80 +50,280 @@ class GeneralPurposeAgent:
             endpoint: str,
             system_prompt: str,
             tools: list[BaseTool],
+            budget: AgentBudget | None = None,
+            http_client_pool: HttpClientPool | None = None,
+            tool_scheduler: ToolScheduler | None = None,
+            result_cache: ToolResultCache | None = None,
+            history_compactor: HistoryCompactor | None = None,
+            state_repository: ConversationStateRepository | None = None,
     ):
-        #TODO:
-        # 1. Set variables: endpoint, system_prompt, tools
-        # 2. Prepare tools_dict where key will be tool name and vale tool itself. It will help us to find tool faster
-        #    on the tool call step
-        # 3. Create dict with `state` name. Inside this dict we need to add `TOOL_CALL_HISTORY_KEY` with empty array.
-        #    Here, in state, we will 'hide' tool call history. We need it since we need to preserve full conversation history.
-        raise NotImplementedError()
+        self.endpoint = endpoint
+        self.system_prompt = system_prompt
+        self.tools = tools
+        self.budget = budget or AgentBudget()
+        self.http_client_pool = http_client_pool
+        self.tool_scheduler = tool_scheduler or ToolScheduler()
+        self.result_cache = result_cache
+        self.history_compactor = history_compactor or HistoryCompactor()
+        self.state_repository = state_repository
+        self._stored_histories: dict[str, list[dict[str, Any]]] = {}
+        self._conversation_id: str | None = None
+        self._tools_dict: dict[str, BaseTool] = {tool.name: tool for tool in tools}
+        self.state: dict[str, Any] = {TOOL_CALL_HISTORY_KEY: []}
+        self.step_timings: list[StepTiming] = []
 
     async def handle_request(self, deployment_name: str, choice: Choice, request: Request, response: Response) -> Message:
-        #TODO:
-        # 1. Create AsyncDial, don't forget to provide endpoint as base_url and api_key. Api_key you can take from `request` as well as api_version
-        #    JFI: while request you will get Per-request API key (not `dial_api_key` configured in Core config). Read
-        #    more about it -> https://docs.dialx.ai/platform/core/per-request-keys
-        # 2. Create `chunks` with created AsyncDial client (chat -> completions -> create). Provide it with:
-        #    - messages: get messages from `request` and unpack them with `_prepare_messages` method
-        #    - tools: provide list with tool schemas
-        #    - deployment_name
-        #    - make it stream
-        # 3. Create:
-        #   - `tool_call_index_map` (it is empty dict), here we will collect tool calls by their indexes.
-        #      Take a look how tool call streaming output is looks like, it is important! -> https://platform.openai.com/docs/guides/function-calling#streaming
-        #   - `content`, here we will collect the content from streaming
-        # 4. Make async loop through `chunks` and then we need to collect content, tool calls and attachments:
-        #   - If chunk has `choices` then:
-        #       - Get 1st choice `delta`
-        #       - if delta is present:
-        #           - if delta content is present then append this content to `choice` (it will be shown in DIAL Chat
-        #             choice), concat delta content to `content` variable
-        #           - if delta has tool_calls then:
-        #               - iterate through tool_calls:
-        #                   - if tool call has `id` (first chunk of tool call) then add to `tool_call_index_map` new
-        #                     tool_call_delta, key will be index and value tool call delta itself
-        #                   - otherwise: get by tool call delta `index` from the `tool_call_index_map` the tool call and
-        #                     then check if provided tool_call_delta contains `function`, if yes then you need to get from
-        #                     `function` `arguments` (if not present set them as empty string to not attach haphazardly None)
-        #                     as `argument_chunk` and add it to the extracted from map tool_call function arguments
-        # 5. Create `assistant_message`, with role, content and tool_calls. `tool_calls` should be a list with ToolCall
-        #    objects generated from `tool_call_index_map` dict values. to create ToolCall use `validate` method (it
-        #    will show you the notification that it is deprecated but we need to use it because DIAL SDK is built on top of pydentic.v1)
-        # 6. Now we at the point where we need to understand if its 'final result' from orchestration model or not:
-        #    check if `assistant_message` contains `tool_calls`, if yes then we need:
-        #       - create `tasks` list. Iterate through `tool_calls` and call `_process_tool_call` method (do not use
-        #         `await` since we will run tool calls execution asynchronously), also you need to provide `conversation_id`
-        #         you can get it in `request` headers, its name is `x-conversation-id`
-        #       - now `gather` tasks with `asyncio` (here you need to await)
-        #       - to the `state` to `TOOL_CALL_HISTORY_KEY` append `assistant_message` as dict and exclude none from this dict
-        #       - extend the `state` `TOOL_CALL_HISTORY_KEY` with tool_messages that we executed above
-        #       - finally make recursive call
-        # 7. We don't have any tool calls and reasy to finish user request. Set choice with `state` and return `assistant_message`
-        raise NotImplementedError()
+        if self.http_client_pool:
+            client = self.http_client_pool.dial(request.api_key)
+        else:
+            client = AsyncDial(
+                base_url=self.endpoint,
+                api_key=request.api_key,
+                api_version=request.api_version,
+            )
+        conversation_id = request.headers.get('x-conversation-id')
+        self._conversation_id = conversation_id
+        deadline = time.monotonic() + self.budget.max_seconds if self.budget.max_seconds else None
+        tokens_used = 0
+        if self.state_repository:
+            self._stored_histories = await self.state_repository.load_histories(
+                [msg.custom_content.state for msg in request.messages if msg.role == Role.ASSISTANT and msg.custom_content],
+                conversation_id,
+            )
+
+        for step in range(1, self.budget.max_steps + 1):
+            try:
+                async with asyncio.timeout_at(self._loop_deadline(deadline)):
+                    llm_started = time.monotonic()
+                    assistant_message, tool_tasks, step_tokens = await self._call_model(
+                        client, deployment_name, choice, request, conversation_id
+                    )
+                    tokens_used += step_tokens
+
+                    tools_started = time.monotonic()
+                    tool_calls = assistant_message.tool_calls or []
+                    if tool_calls:
+                        tool_messages = await self._gather_tool_calls(tool_tasks)
+                        self.state[TOOL_CALL_HISTORY_KEY].append(assistant_message.dict(exclude_none=True))
+                        self.state[TOOL_CALL_HISTORY_KEY].extend(tool_messages)
+            except TimeoutError:
+                return await self._finish_on_budget(choice, "time limit")
+
+            self._record_step(step, llm_started, tools_started, len(tool_calls), step_tokens)
+
+            if not tool_calls:
+                await self._save_state(choice)
+                return assistant_message
+
+            if self.budget.max_tokens is not None and tokens_used >= self.budget.max_tokens:
+                return await self._finish_on_budget(choice, "token budget")
+
+        return await self._finish_on_budget(choice, "maximum number of steps")
+
+    async def _call_model(
+            self,
+            client: AsyncDial,
+            deployment_name: str,
+            choice: Choice,
+            request: Request,
+            conversation_id: str,
+    ) -> tuple[Message, list[asyncio.Task], int]:
+        """
+        Stream one orchestration model call, return assistant message, tool call tasks and tokens spent.
+
+        Every tool call is dispatched as soon as its arguments form a complete JSON object, so tool execution overlaps
+        with the rest of the stream. Returned tasks are ordered as tool calls in the assistant message.
+        """
+        messages = self._prepare_messages(request.messages)
+        extra_params = {"tools": [tool.schema for tool in self.tools]} if self.tools else {}
+        chunks = await client.chat.completions.create(
+            messages=messages,
+            deployment_name=deployment_name,
+            stream=True,
+            api_version=request.api_version,
+            **extra_params,
+        )
+
+        tool_call_index_map: dict[int, Any] = {}
+        tool_task_index_map: dict[int, asyncio.Task] = {}
+        content = ''
+        usage_tokens = None
+
+        def dispatch(index: int) -> None:
+            tool_call_delta = tool_call_index_map[index]
+            if index in tool_task_index_map or not self._has_complete_arguments(tool_call_delta):
+                return
+            tool_task_index_map[index] = asyncio.create_task(
+                self._process_tool_call(ToolCall.validate(tool_call_delta), choice, request.api_key, conversation_id)
+            )
+
+        try:
+            async for chunk in chunks:
+                if usage := getattr(chunk, 'usage', None):
+                    usage_tokens = usage.total_tokens
+                if chunk.choices:
+                    delta = chunk.choices[0].delta
+                    if delta:
+                        if delta.content:
+                            choice.append_content(delta.content)
+                            content += delta.content
+                        if delta.tool_calls:
+                            for tool_call_delta in delta.tool_calls:
+                                if tool_call_delta.id:
+                                    tool_call_index_map[tool_call_delta.index] = tool_call_delta
+                                else:
+                                    tool_call = tool_call_index_map[tool_call_delta.index]
+                                    if tool_call_delta.function:
+                                        argument_chunk = tool_call_delta.function.arguments or ''
+                                        tool_call.function.arguments += argument_chunk
+                                dispatch(tool_call_delta.index)
+
+            tool_calls = [ToolCall.validate(tool_call) for tool_call in tool_call_index_map.values()]
+            # Tool calls with arguments that never became a valid JSON object are executed as before, after the stream
+            for index, tool_call in zip(tool_call_index_map, tool_calls):
+                if index not in tool_task_index_map:
+                    tool_task_index_map[index] = asyncio.create_task(
+                        self._process_tool_call(tool_call, choice, request.api_key, conversation_id)
+                    )
+        except BaseException:
+            await self._cancel_tasks(tool_task_index_map.values())
+            raise
+
+        assistant_message = Message(
+            role=Role.ASSISTANT,
+            content=StrictStr(content),
+            tool_calls=tool_calls or None,
+        )
+
+        if usage_tokens is None:
+            # Rough estimate (~4 chars per token) for deployments that do not report usage in stream
+            generated = content + ''.join(call.function.arguments for call in tool_call_index_map.values())
+            usage_tokens = (len(json.dumps(messages, default=str)) + len(generated)) // 4
+        return assistant_message, [tool_task_index_map[index] for index in tool_call_index_map], usage_tokens
+
+    @staticmethod
+    def _has_complete_arguments(tool_call_delta: Any) -> bool:
+        """Arguments are complete once they parse as a JSON object, nothing but whitespace may follow it."""
+        arguments = tool_call_delta.function.arguments if tool_call_delta.function else None
+        if not arguments or not arguments.rstrip().endswith('}'):
+            return False
+        try:
+            return isinstance(json.loads(arguments), dict)
+        except json.JSONDecodeError:
+            return False
+
+    async def _gather_tool_calls(self, tool_tasks: list[asyncio.Task]) -> list[dict[str, Any]]:
+        try:
+            return list(await asyncio.gather(*tool_tasks))
+        except BaseException:
+            await self._cancel_tasks(tool_tasks)
+            raise
+
+    @staticmethod
+    async def _cancel_tasks(tasks: Any) -> None:
+        tasks = [task for task in tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     def _prepare_messages(self, messages: list[Message]) -> list[dict[str, Any]]:
-        #TODO:
-        # 1. Unpack messages with `unpack_messages` method (it is implemented, just check the logic in this method)
-        # 2. Insert as first message the `system_prompt` (probably you have a question why do we need to insert each
-        #    call system prompt, the reason is simple - security, if people will know our system prompt then it will be
-        #    easier to manipulate LLM, so, best practices are to hide system prompt)
-        # 3. Print history: iterate through unpacked messages and print as json (json.dumps)
-        # 4. Return unpacked messages
-        raise NotImplementedError()
+        unpacked_messages = unpack_messages(messages, self.state[TOOL_CALL_HISTORY_KEY], self._stored_histories)
+        unpacked_messages.insert(0, {"role": Role.SYSTEM.value, "content": self.system_prompt})
+
+        compaction = self.history_compactor.compact(unpacked_messages)
+        if compaction.compacted_messages:
+            print(
+                f"[GeneralPurposeAgent] Compacted {compaction.compacted_messages} old tool results: "
+                f"{compaction.tokens_before} -> {compaction.tokens_after} tokens"
+            )
+        unpacked_messages = compaction.messages
+
+        print("\nHistory:")
+        for msg in unpacked_messages:
+            print(f"     {json.dumps(msg, default=str)}")
+        print(f"{'-' * 100}\n")
+
+        return unpacked_messages
 
     async def _process_tool_call(self, tool_call: ToolCall, choice: Choice, api_key: str, conversation_id: str) -> dict[str, Any]:
-        #TODO:
-        # 1. Get tool name from tool_call function name
-        # 2. Open Stage with StageProcessor (it will be shown in DIAL Chat and Stage serves in our case for
-        #    tool call results representation)
-        # 3. Get tool from `_tools_dict` by tool name
-        # 4. If tool show_in_stage is true then:
-        #   - append content to stage "## Request arguments: \n"
-        #   - append content to stage f"```json\n\r{json.dumps(json.loads(tool_call.function.arguments), indent=2)}\n\r```\n\r"
-        #     it will print arguments as markdown json
-        #   - append content to stage "## Response: \n"
-        # 5. Execute tool
-        # 6. Close stage with StageProcessor
-        # 7. Return tool message as dict and don't forget to exclude none
-        raise NotImplementedError()
+        tool_name = tool_call.function.name
+        stage = StageProcessor.open_stage(choice, tool_name)
+        try:
+            tool = self._tools_dict.get(tool_name)
+            if tool is None:
+                stage.append_content(f"Unknown tool `{tool_name}`\n\r")
+                tool_message = Message(
+                    role=Role.TOOL,
+                    name=StrictStr(tool_name),
+                    tool_call_id=StrictStr(tool_call.id),
+                    content=StrictStr(f"Error: tool `{tool_name}` does not exist."),
+                )
+            else:
+                if tool.show_in_stage:
+                    stage.append_content("## Request arguments: \n")
+                    stage.append_content(
+                        f"```json\n\r{json.dumps(json.loads(tool_call.function.arguments), indent=2)}\n\r```\n\r"
+                    )
+                    stage.append_content("## Response: \n")
+
+                tool_message = await self.tool_scheduler.run(
+                    tool,
+                    ToolCallParams(
+                        tool_call=tool_call,
+                        stage=stage,
+                        choice=choice,
+                        api_key=api_key,
+                        conversation_id=conversation_id,
+                        result_cache=self.result_cache,
+                    )
+                )
+        finally:
+            StageProcessor.close_stage_safely(stage)
+
+        return tool_message.dict(exclude_none=True)
+
+    def _loop_deadline(self, deadline: float | None) -> float | None:
+        """Convert monotonic deadline to event loop time for `asyncio.timeout_at`."""
+        if deadline is None:
+            return None
+        return asyncio.get_running_loop().time() + (deadline - time.monotonic())
+
+    def _record_step(self, step: int, llm_started: float, tools_started: float, tool_calls: int, tokens: int) -> None:
+        timing = StepTiming(
+            step=step,
+            llm_seconds=tools_started - llm_started,
+            tools_seconds=time.monotonic() - tools_started,
+            tool_calls=tool_calls,
+            tokens=tokens,
+        )
+        self.step_timings.append(timing)
+        print(
+            f"[GeneralPurposeAgent] Step {timing.step}: LLM {timing.llm_seconds:.2f}s, "
+            f"{timing.tool_calls} tool calls {timing.tools_seconds:.2f}s, {timing.tokens} tokens"
+        )
+
+    async def _save_state(self, choice: Choice) -> None:
+        """Set state on the choice, tool call history is replaced with a reference if the state repository is used."""
+        state = self.state
+        if self.state_repository:
+            try:
+                state = await self.state_repository.save(self.state, self._conversation_id)
+            except Exception as e:
+                print(f"[GeneralPurposeAgent] Unable to save state to the store, keeping it inline: {e}")
+        choice.set_state(state)
+
+    async def _finish_on_budget(self, choice: Choice, reason: str) -> Message:
+        """Finish request gracefully when a budget is exhausted, keeping collected tool history."""
+        executed_tools = [
+            msg.get("name") for msg in self.state[TOOL_CALL_HISTORY_KEY]
+            if msg.get("role") == Role.TOOL.value
+        ]
+        summary = f"\n\n---\nI had to stop working on this request because the {reason} was reached."
+        if executed_tools:
+            summary += f" Tools executed so far: {', '.join(dict.fromkeys(executed_tools))}."
+        summary += " The results above may be incomplete, you can ask me to continue."
+        print(f"[GeneralPurposeAgent] Finished on {reason} after {len(self.step_timings)} steps")
+
+        choice.append_content(summary)
+        await self._save_state(choice)
+        return Message(role=Role.ASSISTANT, content=StrictStr(summary))
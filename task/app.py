@@ -4,7 +4,7 @@ import uvicorn
 from aidial_sdk import DIALApp
 from aidial_sdk.chat_completion import ChatCompletion, Request, Response
 
-from task.agent import GeneralPurposeAgent
+from task.agent import AgentBudget, GeneralPurposeAgent
 from task.prompts import SYSTEM_PROMPT
 from task.tools.base import BaseTool
 from task.tools.deployment.image_generation_tool import ImageGenerationTool
@@ -12,61 +12,161 @@ from task.tools.files.file_content_extraction_tool import FileContentExtractionT
 from task.tools.py_interpreter.python_code_interpreter_tool import PythonCodeInterpreterTool
 from task.tools.mcp.mcp_client import MCPClient
 from task.tools.mcp.mcp_tool import MCPTool
+from task.tools.rag.chunk_embedding_cache import ChunkEmbeddingCache
 from task.tools.rag.document_cache import DocumentCache
+from task.tools.rag.index_factory import IndexConfig
+from task.tools.rag.index_store import IndexStore
 from task.tools.rag.rag_tool import RagTool
+from task.tools.tool_result_cache import ToolResultCache
+from task.tools.tool_scheduler import ToolScheduler
+from task.utils.extracted_text_cache import ExtractedTextCache
+from task.utils.file_content_cache import FileContentCache
+from task.utils.history_compaction import HistoryCompactor
+from task.utils.http_client_pool import HttpClientPool
+from task.utils.pdf_text_extractor import PdfTextExtractor
+from task.utils.state_store import ConversationStateRepository, create_state_store
 
 DIAL_ENDPOINT = os.getenv('DIAL_ENDPOINT', "http://localhost:8080")
 DEPLOYMENT_NAME = os.getenv('DEPLOYMENT_NAME', 'gpt-4o')
 # DEPLOYMENT_NAME = os.getenv('DEPLOYMENT_NAME', 'claude-haiku-4-5')
+RAG_INDEX_DIR = os.getenv('RAG_INDEX_DIR', '.rag_indexes')
+PDF_EXTRACTION_WORKERS = int(os.getenv('PDF_EXTRACTION_WORKERS', '0'))
+PDF_FAST_BACKEND = os.getenv('PDF_FAST_BACKEND', 'false').lower() == 'true'
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv('DOCUMENT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+RAG_EXECUTOR_WORKERS = int(os.getenv('RAG_EXECUTOR_WORKERS', '2'))
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv('EMBEDDING_MAX_WAIT_MS', '10'))
+RAG_HNSW_THRESHOLD = int(os.getenv('RAG_HNSW_THRESHOLD', '2000'))
+RAG_IVF_THRESHOLD = int(os.getenv('RAG_IVF_THRESHOLD', '50000'))
+RAG_QUANTIZATION = os.getenv('RAG_QUANTIZATION', 'float32')
+CHUNK_EMBEDDING_CACHE_MAX_BYTES = int(os.getenv('CHUNK_EMBEDDING_CACHE_MAX_BYTES', str(128 * 1024 * 1024)))
+AGENT_MAX_STEPS = int(os.getenv('AGENT_MAX_STEPS', '10'))
+AGENT_MAX_TOKENS = int(os.getenv('AGENT_MAX_TOKENS', '0')) or None
+AGENT_MAX_SECONDS = float(os.getenv('AGENT_MAX_SECONDS', '0')) or None
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+TOOL_MAX_CONCURRENCY = int(os.getenv('TOOL_MAX_CONCURRENCY', '32'))
+TOOL_DEFAULT_TIMEOUT = float(os.getenv('TOOL_DEFAULT_TIMEOUT', '120'))
+HISTORY_MAX_TOKENS = int(os.getenv('HISTORY_MAX_TOKENS', '60000'))
+HISTORY_KEEP_RECENT_TURNS = int(os.getenv('HISTORY_KEEP_RECENT_TURNS', '2'))
+TOOL_RESULT_CACHE_MAX_BYTES = int(os.getenv('TOOL_RESULT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+# `inline` (default, tool call history is sent to the client in the assistant message state), or opt-in server-side
+# stores: `redis` (shared by all replicas), `file` (local disk, single replica only) or `memory` (lost on restart)
+STATE_STORE = os.getenv('STATE_STORE', 'inline')
+STATE_STORE_DIR = os.getenv('STATE_STORE_DIR', '.agent_state')
+STATE_TTL_SECONDS = int(os.getenv('STATE_TTL_SECONDS', str(30 * 24 * 3600)))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+PY_INTERPRETER_MCP_URL = os.getenv('PY_INTERPRETER_MCP_URL', 'http://localhost:8050/mcp')
+MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'http://localhost:8051/mcp')
+MCP_POOL_SIZE = int(os.getenv('MCP_POOL_SIZE', '4'))
+MCP_CALL_TIMEOUT = float(os.getenv('MCP_CALL_TIMEOUT', '120'))
 
 
 class GeneralPurposeAgentApplication(ChatCompletion):
 
     def __init__(self):
         self.tools: list[BaseTool] = []
+        self.http_client_pool = HttpClientPool(
+            endpoint=DIAL_ENDPOINT,
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            http2=HTTP2_ENABLED,
+        )
+        self.tool_scheduler = ToolScheduler(max_concurrency=TOOL_MAX_CONCURRENCY, default_timeout=TOOL_DEFAULT_TIMEOUT)
+        self.tool_result_cache = ToolResultCache(max_bytes=TOOL_RESULT_CACHE_MAX_BYTES)
+        self.history_compactor = HistoryCompactor(
+            max_tokens=HISTORY_MAX_TOKENS,
+            keep_recent_turns=HISTORY_KEEP_RECENT_TURNS,
+        )
+        state_store = create_state_store(STATE_STORE, root_dir=STATE_STORE_DIR, redis_url=REDIS_URL)
+        self.state_repository = (
+            ConversationStateRepository(state_store, ttl_seconds=STATE_TTL_SECONDS) if state_store else None
+        )
 
     async def _get_mcp_tools(self, url: str) -> list[BaseTool]:
-        #TODO:
-        # 1. Create list of BaseTool
-        # 2. Create MCPClient
-        # 3. Get tools, iterate through them and add them to created list as MCPTool where the client will be created
-        #    MCPClient and mcp_tool_model will be the tool itself (see what `mcp_client.get_tools` returns).
-        # 4. Return created tool list
-        raise NotImplementedError()
+        tools: list[BaseTool] = []
+        mcp_client = await MCPClient.create(url, pool_size=MCP_POOL_SIZE, call_timeout=MCP_CALL_TIMEOUT)
+        for mcp_tool_model in await mcp_client.get_tools():
+            tools.append(MCPTool(client=mcp_client, mcp_tool_model=mcp_tool_model))
+        return tools
 
     async def _create_tools(self) -> list[BaseTool]:
-        #TODO:
-        # 1. Create list of BaseTool
-        # ---
-        # At the beginning this list can be empty. We will add here tools after they will be implemented
-        # ---
-        # 2. Add ImageGenerationTool with DIAL_ENDPOINT
-        # 3. Add FileContentExtractionTool with DIAL_ENDPOINT
-        # 4. Add RagTool with DIAL_ENDPOINT, DEPLOYMENT_NAME, and create DocumentCache (it has static method `create`)
-        # 5. Add PythonCodeInterpreterTool with DIAL_ENDPOINT, `http://localhost:8050/mcp` mcp_url, tool_name is
-        #    `execute_code`, more detailed about tools see in repository https://github.com/khshanovskyi/mcp-python-code-interpreter
-        # 6. Extend tools with MCP tools from `http://localhost:8051/mcp` (use method `_get_mcp_tools`)
-        return []
+        # All DIAL calls of the tools go through the shared keep-alive connections of `self.http_client_pool`
+        file_content_cache = FileContentCache(DIAL_ENDPOINT, http_client=self.http_client_pool.client)
+        pdf_extractor = PdfTextExtractor(workers=PDF_EXTRACTION_WORKERS, fast_backend=PDF_FAST_BACKEND)
+
+        tools: list[BaseTool] = [
+            ImageGenerationTool(DIAL_ENDPOINT, http_client_pool=self.http_client_pool),
+            FileContentExtractionTool(
+                file_content_cache=file_content_cache,
+                pdf_extractor=pdf_extractor,
+                extracted_text_cache=ExtractedTextCache(),
+            ),
+            RagTool(
+                endpoint=DIAL_ENDPOINT,
+                deployment_name=DEPLOYMENT_NAME,
+                document_cache=DocumentCache.create(max_bytes=DOCUMENT_CACHE_MAX_BYTES),
+                index_store=IndexStore(RAG_INDEX_DIR),
+                file_content_cache=file_content_cache,
+                pdf_extractor=pdf_extractor,
+                executor_workers=RAG_EXECUTOR_WORKERS,
+                embedding_batch_size=EMBEDDING_BATCH_SIZE,
+                embedding_max_wait_ms=EMBEDDING_MAX_WAIT_MS,
+                index_config=IndexConfig(
+                    quantization=RAG_QUANTIZATION,
+                    hnsw_threshold=RAG_HNSW_THRESHOLD,
+                    ivf_threshold=RAG_IVF_THRESHOLD,
+                ),
+                chunk_embedding_cache=ChunkEmbeddingCache(max_bytes=CHUNK_EMBEDDING_CACHE_MAX_BYTES),
+                http_client_pool=self.http_client_pool,
+            ),
+            # More about the tools: https://github.com/khshanovskyi/mcp-python-code-interpreter
+            await PythonCodeInterpreterTool.create(
+                mcp_url=PY_INTERPRETER_MCP_URL,
+                tool_name="execute_code",
+                dial_endpoint=DIAL_ENDPOINT,
+                http_client_pool=self.http_client_pool,
+                mcp_pool_size=MCP_POOL_SIZE,
+            ),
+        ]
+        tools.extend(await self._get_mcp_tools(MCP_SERVER_URL))
+        return tools
 
     async def chat_completion(self, request: Request, response: Response) -> None:
-        #TODO:
-        # 1. If `self.tools` are absent then call `_create_tools` method and assign to the `self.tools`
-        # 2. Create `choice` (`with response.create_single_choice() as choice:`) and:
-        #   - Create GeneralPurposeAgent with:
-        #       - endpoint=DIAL_ENDPOINT
-        #       - system_prompt=SYSTEM_PROMPT
-        #       - tools=self.tools
-        #   - call `handle_request` on created agent with:
-        #       - choice=choice
-        #       - deployment_name=DEPLOYMENT_NAME
-        #       - request=request
-        #       - response=response
-        raise NotImplementedError()
+        if not self.tools:
+            self.tools = await self._create_tools()
+
+        with response.create_single_choice() as choice:
+            agent = GeneralPurposeAgent(
+                endpoint=DIAL_ENDPOINT,
+                system_prompt=SYSTEM_PROMPT,
+                tools=self.tools,
+                budget=AgentBudget(
+                    max_steps=AGENT_MAX_STEPS,
+                    max_tokens=AGENT_MAX_TOKENS,
+                    max_seconds=AGENT_MAX_SECONDS,
+                ),
+                http_client_pool=self.http_client_pool,
+                tool_scheduler=self.tool_scheduler,
+                result_cache=self.tool_result_cache,
+                history_compactor=self.history_compactor,
+                state_repository=self.state_repository,
+            )
+            await agent.handle_request(
+                choice=choice,
+                deployment_name=DEPLOYMENT_NAME,
+                request=request,
+                response=response,
+            )
+        print(f"[GeneralPurposeAgentApplication] HTTP pool: {self.http_client_pool.stats()}")
+
+
+app = DIALApp()
+agent_app = GeneralPurposeAgentApplication()
+app.add_chat_completion(deployment_name="general-purpose-agent", impl=agent_app)
 
-#TODO:
-# 1. Create DIALApp
-# 2. Create GeneralPurposeAgentApplication
-# 3. Add to created DIALApp chat_completion with:
-#       - deployment_name="general-purpose-agent"
-#       - impl=agent_app
-# 4. Run it with uvicorn: `uvicorn.run({CREATED_DIAL_APP}, port=5030, host="0.0.0.0")`
+if __name__ == "__main__":
+    uvicorn.run(app, port=5030, host="0.0.0.0")
@@ -1,3 +1,4 @@
+import traceback
 from abc import ABC, abstractmethod
 from typing import Any
 
@@ -12,18 +13,40 @@ from task.tools.models import ToolCallParams
 class BaseTool(ABC):
 
     async def execute(self, tool_call_params: ToolCallParams) -> Message:
-        #TODO:
-        # 1. Create Message obj with:
-        #       - role=Role.TOOL
-        #       - name=StrictStr(tool_call_params.tool_call.function.name)
-        #       - tool_call_id=StrictStr(tool_call_params.tool_call.id)
-        # 2. We will use Template method pattern here, so:
-        #       - Open `try-except` block
-        #       - In `try` block call`_execute` method, then check if result isinstance of Message, if yes then
-        #         assign result to created message in 1st step, otherwise set Message `content` as StrictStr(result)
-        #       - In `except` block intercept Exception and add it properly to Message `content`
-        # 3. Return created message
-        raise NotImplementedError()
+        message = Message(
+            role=Role.TOOL,
+            name=StrictStr(tool_call_params.tool_call.function.name),
+            tool_call_id=StrictStr(tool_call_params.tool_call.id),
+        )
+
+        result_cache = tool_call_params.result_cache if self.cacheable else None
+        cache_key = None
+        if result_cache:
+            cache_key = result_cache.make_key(
+                tool_call_params.tool_call.function.arguments, tool_call_params.conversation_id
+            )
+        if cache_key:
+            cached_result = result_cache.get(self.name, cache_key)
+            if cached_result is not None:
+                tool_call_params.stage.append_content("_Result of the same call earlier in this conversation:_\n\r")
+                tool_call_params.stage.append_content(f"```text\n\r{cached_result}\n\r```\n\r")
+                message.content = StrictStr(cached_result)
+                return message
+
+        try:
+            result = await self._execute(tool_call_params)
+            if isinstance(result, Message):
+                message = result
+            else:
+                message.content = StrictStr(result)
+                # Only successful results are cached, failed calls (exceptions) are retried on the next call
+                if cache_key:
+                    result_cache.set(self.name, cache_key, result, self.cache_ttl, self.cache_max_entries)
+        except Exception as e:
+            traceback.print_exc()
+            message.content = StrictStr(f"ERROR during tool call execution:\n {e}")
+
+        return message
 
     @abstractmethod
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
@@ -33,6 +56,34 @@ class BaseTool(ABC):
     def show_in_stage(self) -> bool:
         return True
 
+    @property
+    def cacheable(self) -> bool:
+        """
+        Results depend only on arguments and conversation (no side effects), so a repeated call with the same
+        arguments in the same conversation may be served from `ToolCallParams.result_cache`.
+        """
+        return False
+
+    @property
+    def cache_ttl(self) -> float:
+        """Time to live of cached results in seconds."""
+        return 600.0
+
+    @property
+    def cache_max_entries(self) -> int:
+        """Max number of cached results of this tool."""
+        return 128
+
+    @property
+    def max_concurrency(self) -> int | None:
+        """Max number of simultaneous calls of this tool across all requests, None - only the global limit."""
+        return None
+
+    @property
+    def timeout(self) -> float | None:
+        """Max execution time of one call in seconds, None - the scheduler default."""
+        return None
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -51,10 +102,6 @@ class BaseTool(ABC):
     @property
     def schema(self) -> ToolParam:
         """Provides tool schema according to DIAL specification."""
-        #TODO:
-        # see https://dialx.ai/dial_api#operation/sendChatCompletionRequest -> `tools`
-        # or https://platform.openai.com/docs/guides/function-calling#defining-functions
-        raise NotImplementedError()
         return ToolParam(
             type="function",
             function=FunctionParam(
@@ -3,43 +3,76 @@ from abc import ABC, abstractmethod
 from typing import Any
 
 from aidial_client import AsyncDial
-from aidial_sdk.chat_completion import Message, Role, CustomContent
+from aidial_sdk.chat_completion import Message, Role, CustomContent, Attachment
 from pydantic import StrictStr
 
 from task.tools.base import BaseTool
 from task.tools.models import ToolCallParams
+from task.utils.http_client_pool import HttpClientPool
+
+_API_VERSION = '2025-01-01-preview'
 
 
 class DeploymentTool(BaseTool, ABC):
 
-    def __init__(self, endpoint: str):
+    def __init__(self, endpoint: str, http_client_pool: HttpClientPool | None = None):
         self.endpoint = endpoint
+        self.http_client_pool = http_client_pool
 
     @property
     @abstractmethod
     def deployment_name(self) -> str:
         pass
 
+    @property
+    def system_prompt(self) -> str | None:
+        return None
+
     @property
     def tool_parameters(self) -> dict[str, Any]:
         return {}
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
-        #TODO:
-        # 1. Load arguments with `json`
-        # 2. Get `prompt` from arguments (by default we provide `prompt` for each deployment tool, use this param name as standard)
-        # 3. Delete `prompt` from `arguments` (there can be provided additional parameters and `prompt` will be added
-        #    as user message content and other parameters as `custom_fields`)
-        # 4. Create AsyncDial client (api_version is 2025-01-01-preview)
-        # 5. Call chat completions with:
-        #   - messages (here will be just user message. Optionally, in this class you can add system prompt `property`
-        #     and if any deployment tool provides system prompt then we need to set it as first message (system prompt))
-        #   - stream it
-        #   - deployment_name
-        #   - extra_body with `custom_fields` https://dialx.ai/dial_api#operation/sendChatCompletionRequest (last request param in documentation)
-        #   - **self.tool_parameters (will load all tool parameters that were set up in deployment tools as params, like
-        #     `top_p`, `temperature`, etc...)
-        # 6. Collect content and it to stage, also, collect custom_content -> attachments and if they are present add
-        #    them to stage as attachment as well
-        # 7. Return Message with tool role, content, custom_content and tool_call_id
-        raise NotImplementedError()
+        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        prompt = arguments.pop("prompt")
+
+        messages = [{"role": Role.USER.value, "content": prompt}]
+        if self.system_prompt:
+            messages.insert(0, {"role": Role.SYSTEM.value, "content": self.system_prompt})
+
+        client = self._dial_client(tool_call_params.api_key)
+        chunks = await client.chat.completions.create(
+            messages=messages,
+            stream=True,
+            deployment_name=self.deployment_name,
+            extra_body={"custom_fields": {"configuration": {**arguments}}},
+            api_version=_API_VERSION,
+            **self.tool_parameters,
+        )
+
+        stage = tool_call_params.stage
+        content = ''
+        custom_content = CustomContent(attachments=[])
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta:
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    stage.append_content(delta.content)
+                    content += delta.content
+                if delta.custom_content and delta.custom_content.attachments:
+                    for attachment in delta.custom_content.attachments:
+                        stage_attachment = Attachment(**attachment.dict(exclude_none=True))
+                        stage.add_attachment(stage_attachment)
+                        custom_content.attachments.append(stage_attachment)
+
+        return Message(
+            role=Role.TOOL,
+            content=StrictStr(content),
+            custom_content=custom_content,
+            tool_call_id=StrictStr(tool_call_params.tool_call.id),
+        )
+
+    def _dial_client(self, api_key: str) -> AsyncDial:
+        if self.http_client_pool:
+            return self.http_client_pool.dial(api_key)
+        return AsyncDial(base_url=self.endpoint, api_key=api_key, api_version=_API_VERSION)
@@ -10,40 +10,71 @@ from task.tools.models import ToolCallParams
 class ImageGenerationTool(DeploymentTool):
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
-        #TODO:
-        # In this override impl we just need to add extra actions, we need to propagate attachment to the Choice since
-        # in DeploymentTool they were propagated to the stage only as files. The main goal here is show pictures in chat
-        # (DIAL Chat support special markdown to load pictures from DIAL bucket directly to the chat)
-        # ---
-        # 1. Call parent function `_execute` and get result
-        # 2. If attachments are present then filter only "image/png" and "image/jpeg"
-        # 3. Append then as content to choice in such format `f"\n\r![image]({attachment.url})\n\r")`
-        # 4. After iteration through attachment if message content is absent add such instruction:
-        #    'The image has been successfully generated according to request and shown to user!'
-        #    Sometimes models are trying to add generated pictures as well to content (choice), with this instruction
-        #    we are notifing LLLM that it was done (but anyway sometimes it will try to add file 😅)
-        raise NotImplementedError()
+        result = await super()._execute(tool_call_params)
+        if isinstance(result, Message) and result.custom_content and result.custom_content.attachments:
+            for attachment in result.custom_content.attachments:
+                if attachment.type in ("image/png", "image/jpeg"):
+                    tool_call_params.choice.append_content(f"\n\r![image]({attachment.url})\n\r")
+
+            if not result.content:
+                result.content = StrictStr(
+                    'The image has been successfully generated according to request and shown to user!'
+                )
+        return result
+
+    @property
+    def max_concurrency(self) -> int | None:
+        return 4
+
+    @property
+    def timeout(self) -> float | None:
+        return 180.0
 
     @property
     def deployment_name(self) -> str:
-        # TODO: provide deployment name for model that you have added to DIAL Core config (dall-e-3)
-        raise NotImplementedError()
+        return "dall-e-3"
 
     @property
     def name(self) -> str:
-        # TODO: provide self-descriptive name
-        raise NotImplementedError()
+        return "image_generation"
 
     @property
     def description(self) -> str:
-        # TODO: provide tool description that will help LLM to understand when to use this tools and cover 'tricky'
-        #  moments (not more 1024 chars)
-        raise NotImplementedError()
+        return (
+            "Generates an image from a text description with DALL-E 3. The generated image is shown to the user "
+            "automatically, do not repeat it or its link in the answer. Use it only when the user explicitly asks to "
+            "draw, generate or create a picture. The prompt should be an extensive description of the image: subject, "
+            "composition, style, colors and mood. Text rendered inside images is often inaccurate."
+        )
+
     @property
     def parameters(self) -> dict[str, Any]:
-        # TODO: provide tool parameters JSON Schema:
-        #  - prompt is string, description: "Extensive description of the image that should be generated.", required
-        #  - there are 3 optional parameters: https://platform.openai.com/docs/guides/image-generation?image-generation-model=dall-e-3#customize-image-output
-        #  - Sample: https://learn.microsoft.com/en-us/azure/ai-foundry/openai/how-to/dall-e?tabs=dalle-3#call-the-image-generation-api
-        raise NotImplementedError()
-
+        return {
+            "type": "object",
+            "properties": {
+                "prompt": {
+                    "type": "string",
+                    "description": "Extensive description of the image that should be generated."
+                },
+                "size": {
+                    "type": "string",
+                    "description": "The size of the generated image.",
+                    "enum": ["1024x1024", "1024x1792", "1792x1024"],
+                    "default": "1024x1024"
+                },
+                "quality": {
+                    "type": "string",
+                    "description": "The quality of the image, `hd` creates images with finer details.",
+                    "enum": ["standard", "hd"],
+                    "default": "standard"
+                },
+                "style": {
+                    "type": "string",
+                    "description": "The style of the image: `vivid` is hyper-real and dramatic, `natural` is more "
+                                   "realistic.",
+                    "enum": ["vivid", "natural"],
+                    "default": "vivid"
+                }
+            },
+            "required": ["prompt"]
+        }
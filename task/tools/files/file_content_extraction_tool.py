@@ -1,4 +1,7 @@
+import asyncio
+import hashlib
 import json
+from pathlib import Path
 from typing import Any
 
 from aidial_sdk.chat_completion import Message
@@ -6,6 +9,10 @@ from aidial_sdk.chat_completion import Message
 from task.tools.base import BaseTool
 from task.tools.models import ToolCallParams
 from task.utils.dial_file_conent_extractor import DialFileContentExtractor
+from task.utils.csv_paged_table import CsvPagedTable
+from task.utils.extracted_text_cache import ExtractedTextCache, PagedDocument
+from task.utils.file_content_cache import FileContentCache
+from task.utils.pdf_text_extractor import PdfTextExtractor
 
 
 class FileContentExtractionTool(BaseTool):
@@ -15,56 +22,125 @@ class FileContentExtractionTool(BaseTool):
     USAGE: Start with page=1 (by default)
     """
 
-    def __init__(self, endpoint: str):
-        self.endpoint = endpoint
+    def __init__(
+            self,
+            file_content_cache: FileContentCache,
+            pdf_extractor: PdfTextExtractor | None = None,
+            extracted_text_cache: ExtractedTextCache | None = None,
+    ):
+        """
+        :param extracted_text_cache: extracted texts with page index, paginated reading extracts a file only once.
+        """
+        self.file_content_cache = file_content_cache
+        self.pdf_extractor = pdf_extractor
+        self.extracted_text_cache = extracted_text_cache or ExtractedTextCache()
 
     @property
     def show_in_stage(self) -> bool:
-        # TODO: set as False since we will have custom variant of representation in Stage
-        raise NotImplementedError()
+        return False
+
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+    @property
+    def cache_ttl(self) -> float:
+        # Attachment may be replaced under the same URL, do not serve stale pages for long
+        return 300.0
 
     @property
     def name(self) -> str:
-        # TODO: provide self-descriptive name
-        raise NotImplementedError()
+        return "file_content_extraction"
 
     @property
     def description(self) -> str:
-        # TODO: provide tool description that will help LLM to understand when to use this tools and cover 'tricky'
-        #  moments (not more 1024 chars)
-        raise NotImplementedError()
+        return (
+            "Extracts text content from an attached file by its URL. Supported: PDF (text only), TXT, CSV (as markdown "
+            "table), HTML/HTM. Files larger than 10,000 characters are paginated: the response ends with "
+            "`**Page #X. Total pages: Y**`, request the next pages with the `page` parameter only if they are really "
+            "needed. For specific questions about large documents prefer RAG search instead of reading all pages. "
+            "Always start with page 1."
+        )
 
     @property
     def parameters(self) -> dict[str, Any]:
-        # TODO: provide tool parameters JSON Schema:
-        #  - file_url is string, required
-        #  - page is integer, by default 1, description: "For large documents pagination is enabled. Each page consists of 10000 characters."
-        raise NotImplementedError()
+        return {
+            "type": "object",
+            "properties": {
+                "file_url": {
+                    "type": "string",
+                    "description": "URL of the attached file"
+                },
+                "page": {
+                    "type": "integer",
+                    "default": 1,
+                    "description": "For large documents pagination is enabled. Each page consists of 10000 characters "
+                                   "(CSV pages consist of whole rows, about 10000 characters)."
+                }
+            },
+            "required": ["file_url"]
+        }
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
-        #TODO:
-        # 1. Load arguments with `json`
-        # 2. Get `file_url` from arguments
-        # 3. Get `page` from arguments (if none, set as 1 by default)
-        # 4. Get stage from `tool_call_params`
-        # 5. Append content to stage: "## Request arguments: \n"
-        # 6. Append content to stage: `f"**File URL**: {file_url}\n\r"`
-        # 7. If `page` more than 1 then append content to stage: `f"**Page**: {page}\n\r"`
-        # 8. Append content to stage: "## Response: \n"
-        # 9. Implement `task.utils.dial_file_conent_extractor`, create DialFileContentExtractor and call `extract_text`
-        #    method as `content`
-        # 10. If no `content` present then set it as "Error: File content not found."
-        # 11. If `content` len is more than 10_000 then we need to enable pagination:
-        #       - create variable `page_size` as 10_000
-        #       - calculate total pages, formula: (`content len` + `page_size` - 1) // `page_size`
-        #       - if `page` is less then 1 (potential hallucination from LLM) then set it as 1
-        #       - otherwise check if page > total pages (potential hallucination), it yes then set `content` as
-        #         `f"Error: Page {page} does not exist. Total pages: {total_pages}"`
-        #       - prepare `start_index`: `(page - 1) * page_size`
-        #       - prepare `end_index`: `start_index + page_size`
-        #       - get page content from `content` that will start with `start_index` and end with `end_index`
-        #       - set `content` as `f"{page_content}\n\n**Page #{page}. Total pages: {total_pages}**"` (It will show to
-        #         LLM that it is not full content and it is pageable)
-        # 12. Append content to stage: `f"```text\n\r{content}\n\r```\n\r"` (Will be shown in stage as markdown text)
-        # 13. Return `content`
-        raise NotImplementedError()
+        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        file_url = arguments["file_url"]
+        page = arguments.get("page") or 1
+
+        stage = tool_call_params.stage
+        stage.append_content("## Request arguments: \n")
+        stage.append_content(f"**File URL**: {file_url}\n\r")
+        if page > 1:
+            stage.append_content(f"**Page**: {page}\n\r")
+        stage.append_content("## Response: \n")
+
+        paged_document = await self._get_paged_document(file_url, tool_call_params.api_key)
+        if not paged_document.total_pages:
+            content = "Error: File content not found."
+        elif paged_document.total_pages == 1:
+            content = await asyncio.to_thread(paged_document.page, 1)
+            if paged_document.total_pages > 1:
+                # Rows of a CSV page that did not fit when rendered were moved to a new page
+                content = f"{content}\n\n**Page #1. Total pages: {paged_document.total_pages}**"
+        else:
+            total_pages = paged_document.total_pages
+            if page < 1:
+                page = 1
+            if page > total_pages:
+                content = f"Error: Page {page} does not exist. Total pages: {total_pages}"
+            else:
+                page_content = await asyncio.to_thread(paged_document.page, page)
+                content = f"{page_content}\n\n**Page #{page}. Total pages: {paged_document.total_pages}**"
+
+        stage.append_content(f"```text\n\r{content}\n\r```\n\r")
+        return content
+
+    async def _get_paged_document(self, file_url: str, api_key: str) -> PagedDocument:
+        """Get paginated content of the file from cache or extract it."""
+        extractor = DialFileContentExtractor(api_key, self.file_content_cache, self.pdf_extractor)
+        cached_file = await extractor.fetch(file_url)
+
+        file_content = None
+        if cached_file.etag:
+            cache_key = f"{file_url}:{cached_file.etag}"
+        else:
+            file_content = await asyncio.to_thread(cached_file.read)
+            cache_key = f"{file_url}:{hashlib.sha256(file_content).hexdigest()}"
+
+        if paged_document := self.extracted_text_cache.get(cache_key):
+            return paged_document
+
+        if file_content is None:
+            file_content = await asyncio.to_thread(cached_file.read)
+
+        if Path(cached_file.filename).suffix.lower() == '.csv':
+            # CSV is paginated by rows, only the requested window is parsed and rendered
+            try:
+                csv_table = await asyncio.to_thread(
+                    CsvPagedTable, file_content, self.extracted_text_cache.page_size
+                )
+                return self.extracted_text_cache.put(cache_key, csv_table)
+            except Exception as e:
+                print(f"Error indexing CSV {cached_file.filename}, falling back to full extraction: {e}")
+
+        text = await asyncio.to_thread(extractor.extract_text_from_content, file_content, cached_file.filename)
+        return await asyncio.to_thread(self.extracted_text_cache.set, cache_key, text)
@@ -1,66 +1,168 @@
-from typing import Optional, Any
+import asyncio
+import time
+from collections import deque
+from typing import Optional, Any, Awaitable, Callable, TypeVar
 
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
 from mcp.types import CallToolResult, TextContent, ReadResourceResult, TextResourceContents, BlobResourceContents
 from pydantic import AnyUrl
 
 from task.tools.mcp.mcp_tool_model import MCPToolModel
 
+_T = TypeVar('_T')
+
+
+class MCPToolError(RuntimeError):
+    """Tool call completed, but the tool reported an error (`isError` result)."""
+
+
+class _PooledSession:
+    """
+    One streamable-HTTP MCP session. Transport and session contexts are entered and exited by a dedicated owner task
+    (anyio requires it), callers only use `session` while the owner task keeps it open.
+    """
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url
+        self.session: Optional[ClientSession] = None
+        self.last_used = time.monotonic()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def open(self, timeout: float) -> None:
+        self._task = asyncio.create_task(self._run())
+        try:
+            async with asyncio.timeout(timeout):
+                await self._ready.wait()
+        except TimeoutError:
+            await self.close()
+            raise
+        if self._error:
+            raise self._error
+
+    async def close(self, timeout: float = 5.0) -> None:
+        self._closing.set()
+        if self._task is None or self._task.done():
+            return
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.shield(self._task)
+        except TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        try:
+            async with streamablehttp_client(self.server_url) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    init_result = await session.initialize()
+                    print(f"[MCPClient] Connected to {self.server_url}: {init_result.serverInfo}")
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            print(f"[MCPClient] Session to {self.server_url} closed with error: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
 
 class MCPClient:
-    """Handles MCP server connection and tool execution"""
+    """
+    Handles MCP server connection and tool execution.
+
+    Keeps a pool of up to `pool_size` sessions to the server, so concurrent calls do not share one session. A session
+    idle for more than `health_check_interval` seconds is pinged before use (a lost session of a restarted server does
+    not fail requests, they hang, so the ping is limited by `health_check_timeout`), a failed check drops all idle
+    sessions.
+    Dead or failed sessions are dropped and replaced, new sessions are opened with up to `max_connect_attempts`
+    attempts and exponential backoff, so the client recovers after a server restart. Every request is limited by
+    `call_timeout`.
+    """
 
-    def __init__(self, mcp_server_url: str) -> None:
+    def __init__(
+            self,
+            mcp_server_url: str,
+            pool_size: int = 4,
+            call_timeout: float = 120.0,
+            connect_timeout: float = 10.0,
+            health_check_interval: float = 30.0,
+            health_check_timeout: float = 2.0,
+            max_connect_attempts: int = 3,
+            reconnect_backoff: float = 0.5,
+    ) -> None:
         self.server_url = mcp_server_url
-        self.session: Optional[ClientSession] = None
-        self._streams_context = None
-        self._session_context = None
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.max_connect_attempts = max_connect_attempts
+        self.reconnect_backoff = reconnect_backoff
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._idle: deque[_PooledSession] = deque()
+        self._sessions: set[_PooledSession] = set()
 
     @classmethod
-    async def create(cls, mcp_server_url: str) -> 'MCPClient':
+    async def create(cls, mcp_server_url: str, **pool_options: Any) -> 'MCPClient':
         """Async factory method to create and connect MCPClient"""
-        #TODO:
-        # 1. Create instance of MCPClient with `cls`
-        # 2. Connect to MCP server
-        # 3. return created instance
-        raise NotImplementedError()
+        instance = cls(mcp_server_url, **pool_options)
+        await instance.connect()
+        return instance
 
     async def connect(self):
-        """Connect to MCP server"""
-        #TODO:
-        # 1. Check if session is present, if yes just return to finsh execution
-        # 2. Call `streamablehttp_client` method with `server_url` and set as `self._streams_context`
-        # 3. Enter `self._streams_context`, result set as `read_stream, write_stream, _`
-        # 4. Create ClientSession with streams from above and set as `self._session_context`
-        # 5. Enter `self._session_context` and set as self.session
-        # 6. Initialize session and print its result to console
-        raise NotImplementedError()
-
+        """Open the first session, fails if MCP server is not reachable"""
+        if self._sessions:
+            return
+        self._idle.append(await self._open_session())
 
     async def get_tools(self) -> list[MCPToolModel]:
         """Get available tools from MCP server"""
-        #TODO: Get and return MCP tools as list of MCPToolModel
-        raise NotImplementedError()
+        result = await self._run(lambda session: session.list_tools(), retry=True)
+        return [
+            MCPToolModel(
+                name=tool.name,
+                description=tool.description or '',
+                parameters=tool.inputSchema,
+                read_only=bool(tool.annotations and tool.annotations.readOnlyHint),
+            )
+            for tool in result.tools
+        ]
 
     async def call_tool(self, tool_name: str, tool_args: dict[str, Any]) -> Any:
-        """Call a tool on the MCP server"""
-        #TODO: Make tool call and return its result. Do it in proper way (it returns array of content and you need to handle it properly)
-        raise NotImplementedError()
+        """Call a tool on the MCP server, raises `MCPToolError` if the tool reported an error"""
+        # Not retried: the tool may have side effects and might have been executed before the session failed
+        result: CallToolResult = await self._run(lambda session: session.call_tool(tool_name, tool_args))
+        texts = [content.text for content in result.content if isinstance(content, TextContent)]
+        content = '\n'.join(texts)
+        if result.isError:
+            raise MCPToolError(f"Tool `{tool_name}` failed: {content}")
+        return content
 
     async def get_resource(self, uri: AnyUrl) -> str | bytes:
         """Get specific resource content"""
-        #TODO: Get and return resource. Resources can be returned as TextResourceContents and BlobResourceContents, you
-        #      need to return resource value (text or blob)
-        raise NotImplementedError()
+        result: ReadResourceResult = await self._run(lambda session: session.read_resource(uri), retry=True)
+        content = result.contents[0]
+        if isinstance(content, TextResourceContents):
+            return content.text
+        if isinstance(content, BlobResourceContents):
+            return content.blob
+        raise ValueError(f"Unsupported resource content type: {type(content)}")
 
     async def close(self):
-        """Close connection to MCP server"""
-        #TODO:
-        # 1. Close `self._session_context`
-        # 2. Close `self._streams_context`
-        # 3. Set session, _session_context and _streams_context as None
-        raise NotImplementedError()
+        """Close all sessions to MCP server"""
+        sessions = list(self._sessions)
+        self._sessions.clear()
+        self._idle.clear()
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -72,3 +174,67 @@ class MCPClient:
         await self.close()
         return False
 
+    async def _run(self, request: Callable[[ClientSession], Awaitable[_T]], retry: bool = False) -> _T:
+        """Run request on a pooled session. Idempotent requests are retried once on a new session if it failed."""
+        async with self._semaphore:
+            for attempt in range(2 if retry else 1):
+                pooled_session = await self._acquire()
+                try:
+                    async with asyncio.timeout(self.call_timeout):
+                        result = await request(pooled_session.session)
+                except (McpError, asyncio.CancelledError):
+                    # Error reported by the server or cancelled caller, the session itself is fine
+                    self._release(pooled_session)
+                    raise
+                except Exception as e:
+                    await self._discard(pooled_session)
+                    if attempt or not retry or isinstance(e, TimeoutError):
+                        raise
+                    print(f"[MCPClient] Request to {self.server_url} failed, retrying on a new session: {e}")
+                else:
+                    self._release(pooled_session)
+                    return result
+
+    async def _acquire(self) -> _PooledSession:
+        while self._idle:
+            pooled_session = self._idle.pop()
+            if not pooled_session.alive:
+                await self._discard(pooled_session)
+                continue
+            if time.monotonic() - pooled_session.last_used > self.health_check_interval:
+                try:
+                    async with asyncio.timeout(self.health_check_timeout):
+                        await pooled_session.session.send_ping()
+                except Exception as e:
+                    print(f"[MCPClient] Health check of session to {self.server_url} failed: {e!r}")
+                    # Other idle sessions are most likely broken the same way (e.g. server restart), replace them all
+                    stale_sessions = [pooled_session, *self._idle]
+                    self._idle.clear()
+                    await asyncio.gather(*(self._discard(stale) for stale in stale_sessions))
+                    break
+            return pooled_session
+        return await self._open_session()
+
+    async def _open_session(self) -> _PooledSession:
+        for attempt in range(self.max_connect_attempts):
+            pooled_session = _PooledSession(self.server_url)
+            try:
+                await pooled_session.open(self.connect_timeout)
+            except Exception as e:
+                if attempt == self.max_connect_attempts - 1:
+                    raise ConnectionError(f"Unable to connect to MCP server {self.server_url}: {e}") from e
+                delay = self.reconnect_backoff * 2 ** attempt
+                print(f"[MCPClient] Connection to {self.server_url} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                self._sessions.add(pooled_session)
+                return pooled_session
+
+    def _release(self, pooled_session: _PooledSession) -> None:
+        pooled_session.last_used = time.monotonic()
+        if pooled_session in self._sessions:
+            self._idle.append(pooled_session)
+
+    async def _discard(self, pooled_session: _PooledSession) -> None:
+        self._sessions.discard(pooled_session)
+        await pooled_session.close()
@@ -12,30 +12,34 @@ from task.tools.models import ToolCallParams
 class MCPTool(BaseTool):
 
     def __init__(self, client: MCPClient, mcp_tool_model: MCPToolModel):
-        #TODO:
-        # 1. Set client
-        # 2. Set mcp_tool_model
-        raise NotImplementedError()
+        self.client = client
+        self.mcp_tool_model = mcp_tool_model
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
-        #TODO:
-        # 1. Load arguments wit `json`
-        # 2. Get content with mcp client tool call
-        # 3. Append retrieved content to stage
-        # 4. return content
-        raise NotImplementedError()
+        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        content = await self.client.call_tool(self.mcp_tool_model.name, arguments)
+        tool_call_params.stage.append_content(f"```text\n\r{content}\n\r```\n\r")
+        return content
+
+    @property
+    def cacheable(self) -> bool:
+        # Only tools the server declares free of side effects may be served from the cache: an idempotent tool still
+        # writes, and a cached `set(x=1)` after `set(x=2)` would never run
+        return self.mcp_tool_model.read_only
+
+    @property
+    def cache_ttl(self) -> float:
+        # Results of remote tools (e.g. web search) go stale quickly
+        return 120.0
 
     @property
     def name(self) -> str:
-        # TODO: provide name from mcp_tool_model
-        raise NotImplementedError()
+        return self.mcp_tool_model.name
 
     @property
     def description(self) -> str:
-        # TODO: provide description from mcp_tool_model
-        raise NotImplementedError()
+        return self.mcp_tool_model.description
 
     @property
     def parameters(self) -> dict[str, Any]:
-        # TODO: provide parameters from mcp_tool_model
-        raise NotImplementedError()
+        return self.mcp_tool_model.parameters
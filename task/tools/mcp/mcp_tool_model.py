@@ -7,3 +7,5 @@ class MCPToolModel(BaseModel):
     name: str
     description: str
     parameters: dict[str, Any]
+    # `readOnlyHint` tool annotation reported by the server, unknown means side effects
+    read_only: bool = False
@@ -1,7 +1,11 @@
 from dataclasses import dataclass
+from typing import Optional
+
 from aidial_sdk.chat_completion import Stage, Choice
 from aidial_client.types.chat.legacy.chat_completion import ToolCall
 
+from task.tools.tool_result_cache import ToolResultCache
+
 
 @dataclass
 class ToolCallParams:
@@ -10,3 +14,4 @@ class ToolCallParams:
     choice: Choice
     api_key: str
     conversation_id: str
+    result_cache: Optional[ToolResultCache] = None
@@ -2,7 +2,7 @@ import base64
 import json
 from typing import Any, Optional
 
-from aidial_client import Dial
+from aidial_client import AsyncDial
 from aidial_sdk.chat_completion import Message, Attachment
 from pydantic import StrictStr, AnyUrl
 
@@ -11,6 +11,7 @@ from task.tools.py_interpreter._response import _ExecutionResult
 from task.tools.mcp.mcp_client import MCPClient
 from task.tools.mcp.mcp_tool_model import MCPToolModel
 from task.tools.models import ToolCallParams
+from task.utils.http_client_pool import HttpClientPool
 
 
 class PythonCodeInterpreterTool(BaseTool):
@@ -26,18 +27,24 @@ class PythonCodeInterpreterTool(BaseTool):
             mcp_tool_models: list[MCPToolModel],
             tool_name: str,
             dial_endpoint: str,
+            http_client_pool: Optional[HttpClientPool] = None,
     ):
         """
         :param tool_name: it must be actual name of tool that executes code. It is 'execute_code'.
             https://github.com/khshanovskyi/mcp-python-code-interpreter/blob/main/interpreter/server.py#L303
+        :param http_client_pool: shared DIAL connections for uploading generated files, a new client per call if absent.
         """
-        #TODO:
-        # 1. Set dial_endpoint
-        # 2. Set mcp_client
-        # 3. Set _code_execute_tool: Optional[MCPToolModel] as None at start, then iterate through `mcp_tool_models` and
-        #    if any of tool model has the same same as `tool_name` then set _code_execute_tool as tool model
-        # 4. If `_code_execute_tool` is null then raise error (We cannot set up PythonCodeInterpreterTool without tool that executes code)
-        raise NotImplementedError()
+        self.dial_endpoint = dial_endpoint
+        self.mcp_client = mcp_client
+        self.http_client_pool = http_client_pool
+        self._code_execute_tool: Optional[MCPToolModel] = None
+        for tool_model in mcp_tool_models:
+            if tool_model.name == tool_name:
+                self._code_execute_tool = tool_model
+                break
+
+        if self._code_execute_tool is None:
+            raise ValueError(f"Tool `{tool_name}` is not provided by MCP server {mcp_client.server_url}")
 
     @classmethod
     async def create(
@@ -45,66 +52,93 @@ class PythonCodeInterpreterTool(BaseTool):
             mcp_url: str,
             tool_name: str,
             dial_endpoint: str,
+            http_client_pool: Optional[HttpClientPool] = None,
+            mcp_pool_size: int = 4,
+            mcp_call_timeout: float = 300.0,
     ) -> 'PythonCodeInterpreterTool':
         """Async factory method to create PythonCodeInterpreterTool"""
-        #TODO:
-        # 1. Create MCPClient
-        # 2. Get tools
-        # 3. Create PythonCodeInterpreterTool instance and return it
-        raise NotImplementedError()
+        # Code execution may take as long as the tool timeout, MCP calls must not be cut earlier
+        mcp_client = await MCPClient.create(mcp_url, pool_size=mcp_pool_size, call_timeout=mcp_call_timeout)
+        mcp_tool_models = await mcp_client.get_tools()
+        return cls(
+            mcp_client=mcp_client,
+            mcp_tool_models=mcp_tool_models,
+            tool_name=tool_name,
+            dial_endpoint=dial_endpoint,
+            http_client_pool=http_client_pool,
+        )
 
     @property
     def show_in_stage(self) -> bool:
-        # TODO: set as False since we will have custom variant of representation in Stage
-        raise NotImplementedError()
+        return False
+
+    @property
+    def max_concurrency(self) -> int | None:
+        return 4
+
+    @property
+    def timeout(self) -> float | None:
+        return 300.0
 
     @property
     def name(self) -> str:
-        # TODO: provide `_code_execute_tool` name
-        raise NotImplementedError()
+        return self._code_execute_tool.name
 
     @property
     def description(self) -> str:
-        # TODO: provide `_code_execute_tool` description
-        raise NotImplementedError()
+        return self._code_execute_tool.description
 
     @property
     def parameters(self) -> dict[str, Any]:
-        # TODO: provide `_code_execute_tool` parameters
-        raise NotImplementedError()
+        return self._code_execute_tool.parameters
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
-        #TODO:
-        # 1. Load arguments with `json`
-        # 2. Get `code` from arguments
-        # 3. Get `session_id` from arguments (it is optional parameter, use get method)
-        # 4. Get stage from `tool_call_params`
-        # 5. Append content to stage: "## Request arguments: \n"
-        # 6. Append content to stage: `"```python\n\r{code}\n\r```\n\r"` it will show code in stage as python markdown
-        # 7. Append session to stage:
-        #       - if `session_id` is present and not 0 then append to stage `f"**session_id**: {session_id}\n\r"`
-        #       - otherwise append "New session will be created\n\r"
-        # 8. Make tool call
-        # 9. Load retrieved response as json (️⚠️ here can be potential issues if you didn't properly implemented
-        #    MCPClient tool call, it must return string)
-        # 10. Validate result with _ExecutionResult (it is full copy of https://github.com/khshanovskyi/mcp-python-code-interpreter/blob/main/interpreter/models.py)
-        # 11. If execution_result contains files we need to pool files from PyInterpreter and upload them to DIAL bucked:
-        #       - Create Dial client
-        #       - Get with client `my_appdata_home` path as `files_home`
-        #       - Iterated through files and:
-        #           - get file name and mime_type and assign to appropriate variables
-        #           - get resource with mcp client by URL from file (https://github.com/khshanovskyi/mcp-python-code-interpreter/blob/main/interpreter/server.py#L429)
-        #           - according to MCP binary resources must be encoded with base64 https://modelcontextprotocol.io/specification/2025-06-18/server/resources#binary-content
-        #             Check if mime_type starts with `text/` or some of 'application/json', 'application/xml', is yes
-        #             then encode resource with 'utf-8' format (text will be present as bytes to upload to DIAL bucket).
-        #             Otherwise (binary file) decode it with `b64decode`
-        #           - Prepare URL to upload downloaded file: f"files/{(files_home / file_name).as_posix()}"
-        #           - Upload file with DIAL client
-        #           - Prepare Attachment with url, type (mime_type), and title (file_name)
-        #           - Add attachment to stage and also add this attachment to choice (it will be chown in both stage and choice)
-        #       - Add to execution_result json addition
-        # 12. Check if execution_result output present and if yes iterate through all output results and cut it length
-        #     to 1000 chars, it is needed to avoid high costs and context window overload
-        # 13. Append to stage response f"```json\n\r{execution_result.model_dump_json(indent=2)}\n\r```\n\r"
-        # 14. Return execution result as string (model_dump_json method)
-        raise NotImplementedError()
+        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        code = arguments.get("code")
+        session_id = arguments.get("session_id")
+        stage = tool_call_params.stage
+
+        stage.append_content("## Request arguments: \n")
+        stage.append_content(f"```python\n\r{code}\n\r```\n\r")
+        if session_id:
+            stage.append_content(f"**session_id**: {session_id}\n\r")
+        else:
+            stage.append_content("New session will be created\n\r")
+
+        response = await self.mcp_client.call_tool(self._code_execute_tool.name, arguments)
+        execution_result = _ExecutionResult.model_validate(json.loads(response))
+
+        if execution_result.files:
+            client = self._dial_client(tool_call_params.api_key)
+            files_home = await client.my_appdata_home()
+            for file in execution_result.files:
+                file_name = file.name
+                mime_type = file.mime_type
+                resource = await self.mcp_client.get_resource(AnyUrl(file.uri))
+                if mime_type.startswith("text/") or mime_type in ('application/json', 'application/xml'):
+                    file_content = resource.encode('utf-8') if isinstance(resource, str) else resource
+                else:
+                    file_content = base64.b64decode(resource)
+
+                upload_url = f"files/{(files_home / file_name).as_posix()}"
+                await client.files.upload(url=upload_url, file=(file_name, file_content, mime_type))
+
+                attachment = Attachment(url=StrictStr(upload_url), type=StrictStr(mime_type), title=StrictStr(file_name))
+                stage.add_attachment(attachment)
+                tool_call_params.choice.add_attachment(attachment)
+
+            execution_result.result = (
+                f"{execution_result.result or ''}\nGenerated files were uploaded to DIAL storage and attached to the "
+                f"response, they are already shown to the user."
+            ).lstrip()
+
+        if execution_result.output:
+            execution_result.output = [output[:1000] for output in execution_result.output]
+
+        stage.append_content(f"```json\n\r{execution_result.model_dump_json(indent=2)}\n\r```\n\r")
+        return execution_result.model_dump_json()
+
+    def _dial_client(self, api_key: str) -> AsyncDial:
+        if self.http_client_pool:
+            return self.http_client_pool.dial(api_key)
+        return AsyncDial(base_url=self.dial_endpoint, api_key=api_key)
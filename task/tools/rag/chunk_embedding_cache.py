@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from task.utils.cache_stats import CacheStats
+
+
+class ChunkEmbeddingCache:
+    """
+    Thread-safe, memory-bounded cache of chunk embeddings keyed by hash of the chunk text.
+    Re-indexing an edited document embeds only new or changed chunks, vectors of unchanged ones are reused.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._resident_bytes = 0
+        self._stats = CacheStats(max_bytes=max_bytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chunk_hash(chunk: str) -> str:
+        return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        """
+        Retrieve cached embeddings and mark them as most recently used.
+
+        Args:
+            keys: Chunk hashes
+
+        Returns:
+            Embedding per key, None for keys that are not cached
+        """
+        result = []
+        with self._lock:
+            for key in keys:
+                embedding = self._cache.get(key)
+                if embedding is None:
+                    self._stats.misses += 1
+                else:
+                    self._cache.move_to_end(key)
+                    self._stats.hits += 1
+                result.append(embedding)
+        return result
+
+    def set_many(self, keys: list[str], embeddings: np.ndarray) -> None:
+        """
+        Store embeddings, evicting least recently used ones if the byte budget is exceeded.
+
+        Args:
+            keys: Chunk hashes
+            embeddings: Matrix with one embedding row per key
+        """
+        with self._lock:
+            for key, embedding in zip(keys, embeddings):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    continue
+                # Copy row so the cache does not keep the whole batch matrix alive
+                embedding = np.array(embedding, dtype='float32')
+                self._cache[key] = embedding
+                self._resident_bytes += embedding.nbytes
+
+            while self._resident_bytes > self._max_bytes and self._cache:
+                _, evicted = self._cache.popitem(last=False)
+                self._resident_bytes -= evicted.nbytes
+                self._stats.evictions += 1
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of cache counters."""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._cache),
+                resident_bytes=self._resident_bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def clear(self) -> None:
+        """Clear all cached embeddings."""
+        with self._lock:
+            self._cache.clear()
+            self._resident_bytes = 0
@@ -1,30 +1,50 @@
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, time, timedelta
 from typing import Any, Tuple
 import threading
 
+import faiss
+
+from task.utils.cache_stats import CacheStats
+
+
+@dataclass
+class _CacheEntry:
+    index: Any
+    chunks: Any
+    timestamp: datetime
+    size_bytes: int
+
 
 class DocumentCache:
     """
-    Thread-safe document cache with automatic cleanup at midnight.
-    Removes entries older than 24 hours.
+    Thread-safe, memory-bounded document cache.
+    Entries are evicted in LRU order once the byte budget (index vectors + chunk strings) is exceeded.
+    Entries older than `ttl` are removed lazily on access and by the cleanup thread that runs at midnight.
     """
 
-    def __init__(self):
-        self._cache: dict[str, Tuple[Any, Any, datetime]] = {}
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, ttl: timedelta = timedelta(hours=24)):
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._resident_bytes = 0
+        self._stats = CacheStats(max_bytes=max_bytes)
         self._lock = threading.Lock()
         self._cleanup_thread = None
         self._stop_event = threading.Event()
         self._running = False
 
     @classmethod
-    def create(cls) ->'DocumentCache':
-        instance = cls()
+    def create(cls, max_bytes: int = 512 * 1024 * 1024, ttl: timedelta = timedelta(hours=24)) -> 'DocumentCache':
+        instance = cls(max_bytes=max_bytes, ttl=ttl)
         instance.start_cleanup_task()
         return instance
 
     def get(self, key: str) -> Tuple[Any, Any] | None:
         """
-        Retrieve a cached entry.
+        Retrieve a cached entry and mark it as most recently used.
 
         Args:
             key: Cache key
@@ -33,56 +53,136 @@ class DocumentCache:
             Tuple of (index, chunks) if found and not expired, None otherwise
         """
         with self._lock:
-            if key in self._cache:
-                index, chunks, timestamp = self._cache[key]
-                if datetime.now() - timestamp < timedelta(hours=24):
-                    return (index, chunks)
-                else:
-                    del self._cache[key]
+            entry = self._cache.get(key)
+            if entry is not None:
+                if datetime.now() - entry.timestamp < self._ttl:
+                    self._cache.move_to_end(key)
+                    self._stats.hits += 1
+                    return (entry.index, entry.chunks)
+                self._remove(key)
+                self._stats.expirations += 1
+            self._stats.misses += 1
             return None
 
     def set(self, key: str, index: Any, chunks: Any) -> None:
         """
-        Store an entry in the cache.
+        Store an entry in the cache, evicting least recently used entries if the byte budget is exceeded.
 
         Args:
             key: Cache key
             index: FAISS index
             chunks: Document chunks
         """
+        size_bytes = self.estimate_size(index, chunks)
         with self._lock:
-            self._cache[key] = (index, chunks, datetime.now())
+            if key in self._cache:
+                self._remove(key)
+
+            if size_bytes > self._max_bytes:
+                print(f"[DocumentCache] Entry {key} ({size_bytes} bytes) exceeds the cache budget, not cached")
+                return
+
+            self._cache[key] = _CacheEntry(index, chunks, datetime.now(), size_bytes)
+            self._resident_bytes += size_bytes
+
+            while self._resident_bytes > self._max_bytes:
+                oldest_key = next(iter(self._cache))
+                self._remove(oldest_key)
+                self._stats.evictions += 1
 
     def clear(self) -> None:
         """Clear all cached entries."""
         with self._lock:
             self._cache.clear()
+            self._resident_bytes = 0
 
     def cleanup_old_entries(self) -> int:
         """
-        Remove entries older than 24 hours.
+        Remove entries older than the configured TTL.
 
         Returns:
             Number of entries removed
         """
         now = datetime.now()
-        cutoff_time = now - timedelta(hours=24)
+        cutoff_time = now - self._ttl
 
         with self._lock:
             keys_to_remove = [
-                key for key, (_, _, timestamp) in self._cache.items()
-                if timestamp < cutoff_time
+                key for key, entry in self._cache.items()
+                if entry.timestamp < cutoff_time
             ]
 
             for key in keys_to_remove:
-                del self._cache[key]
+                self._remove(key)
 
             removed_count = len(keys_to_remove)
+            self._stats.expirations += removed_count
             if removed_count > 0:
                 print(f"[DocumentCache] Cleaned up {removed_count} expired entries at {now}")
 
             return removed_count
 
+    def stats(self) -> CacheStats:
+        """Return a snapshot of cache counters."""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                entries=len(self._cache),
+                resident_bytes=self._resident_bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    @staticmethod
+    def estimate_size(index: Any, chunks: Any) -> int:
+        """
+        Estimate resident memory of an entry: stored index data plus chunk strings.
+
+        Args:
+            index: FAISS index
+            chunks: Document chunks
+
+        Returns:
+            Approximate size in bytes
+        """
+        index_bytes = DocumentCache._index_bytes(index) if index is not None else 0
+        chunks_bytes = sum(sys.getsizeof(chunk) for chunk in chunks) if chunks else 0
+        return index_bytes + chunks_bytes
+
+    @staticmethod
+    def _index_bytes(index: Any) -> int:
+        """
+        Size of vector codes (per quantization) and of the index structure: HNSW graph links and levels, IVF ids and
+        coarse centroids, PQ codebooks and precomputed tables. Unknown index types are serialized.
+        """
+        hnsw = getattr(index, 'hnsw', None)
+        if hnsw is not None:
+            links_bytes = hnsw.neighbors.size() * 4 + hnsw.levels.size() * 4 + hnsw.offsets.size() * 8
+            return DocumentCache._index_bytes(faiss.downcast_index(index.storage)) + links_bytes
+
+        code_size = getattr(index, 'code_size', None)
+        if code_size is None:
+            return int(faiss.serialize_index(index).nbytes)
+
+        index_bytes = index.ntotal * code_size
+        if getattr(index, 'invlists', None) is not None:
+            index_bytes += index.ntotal * 8 + index.nlist * index.d * 4
+        pq = getattr(index, 'pq', None)
+        if pq is not None:
+            # M * 2^nbits centroids of d / M floats, e.g. 384 KB for PQ48x8 of 384-dim vectors
+            index_bytes += pq.centroids.size() * 4
+            precomputed_table = getattr(index, 'precomputed_table', None)
+            if precomputed_table is not None:
+                index_bytes += precomputed_table.size() * 4
+        return index_bytes
+
+    def _remove(self, key: str) -> None:
+        """Remove entry and release its bytes. Must be called under lock."""
+        entry = self._cache.pop(key)
+        self._resident_bytes -= entry.size_bytes
+
     def _schedule_midnight_cleanup(self) -> None:
         """Background thread that runs cleanup at midnight every day."""
         while not self._stop_event.is_set():
@@ -125,5 +225,7 @@ class DocumentCache:
             return len(self._cache)
 
     def __contains__(self, key: str) -> bool:
-        """Check if a key exists in the cache (and is not expired)."""
-        return self.get(key) is not None
\ No newline at end of file
+        """Check if a key exists in the cache (and is not expired) without touching LRU order or stats."""
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and datetime.now() - entry.timestamp < self._ttl
@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from typing import Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+
+@dataclass
+class EmbeddingStats:
+    requests: int = 0
+    texts: int = 0
+    batches: int = 0
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.texts / self.batches if self.batches else 0.0
+
+
+class EmbeddingService:
+    """
+    In-process micro-batching embedding service.
+
+    Encode requests from concurrent RAG calls (document chunks and queries) are collected into batches of up to
+    `max_batch_size` texts or until `max_wait_ms` elapses, encoded with one forward pass in the executor, and every
+    caller receives its own slice of the result. Large requests are split into slices of `max_batch_size`, so short
+    query encodes are interleaved with document indexing instead of waiting for it.
+    """
+
+    def __init__(
+            self,
+            model: SentenceTransformer,
+            executor: Executor,
+            max_batch_size: int = 64,
+            max_wait_ms: float = 10,
+    ):
+        self._model = model
+        self._executor = executor
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._stats = EmbeddingStats()
+
+    async def encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Encode texts, batching them together with concurrent requests.
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            float32 matrix of shape (len(texts), dim)
+        """
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+
+        futures = []
+        for start in range(0, len(texts), self._max_batch_size):
+            future = loop.create_future()
+            await self._queue.put((texts[start:start + self._max_batch_size], future))
+            futures.append(future)
+
+        self._stats.requests += 1
+        parts = await asyncio.gather(*futures)
+        if not parts:
+            return np.empty((0, self._model.get_sentence_embedding_dimension()), dtype='float32')
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def stats(self) -> EmbeddingStats:
+        """Return a snapshot of service counters."""
+        return EmbeddingStats(
+            requests=self._stats.requests,
+            texts=self._stats.texts,
+            batches=self._stats.batches,
+        )
+
+    def _ensure_worker(self) -> None:
+        if self._worker_task is None or self._worker_task.done():
+            self._queue = asyncio.Queue()
+            self._worker_task = asyncio.create_task(self._run(), name="EmbeddingService-Worker")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            total = len(batch[0][0])
+            deadline = loop.time() + self._max_wait
+
+            while total < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                total += len(item[0])
+
+            batch_texts = [text for texts, _ in batch for text in texts]
+            try:
+                embeddings = await loop.run_in_executor(
+                    self._executor,
+                    partial(self._model.encode, batch_texts, batch_size=self._max_batch_size, convert_to_numpy=True)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._stats.batches += 1
+            self._stats.texts += len(batch_texts)
+
+            embeddings = np.asarray(embeddings, dtype='float32')
+            offset = 0
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(texts)])
+                offset += len(texts)
@@ -0,0 +1,223 @@
+import math
+import time
+from dataclasses import dataclass, asdict
+from typing import Any
+
+import faiss
+import numpy as np
+
+
+@dataclass
+class IndexConfig:
+    """
+    Chooses FAISS index type from the number of chunks:
+    - below `hnsw_threshold`: exact `IndexFlatL2`
+    - below `ivf_threshold`: HNSW graph (no training, good recall on mid-size corpora)
+    - above: IVF with `ivf_nlist` clusters (defaults to ~4*sqrt(n)), `ivf_nprobe` of them are scanned per query
+
+    Vectors are stored according to `quantization`:
+    - `float32`: full precision (1536 bytes per 384-dim vector)
+    - `float16`: half precision scalar quantizer (2x smaller)
+    - `sq8`: 8-bit scalar quantizer (4x smaller)
+    - `pq`: product quantizer with `pq_m` sub-vectors of `pq_nbits` bits (48 bytes per vector with defaults),
+      falls back to `sq8` below `39 * 2**pq_nbits` vectors: with fewer training points per centroid the codebooks
+      are poor, and their size (~384 KB with defaults) outweighs the savings on codes
+    """
+    quantization: str = "float32"
+    pq_m: int = 48
+    pq_nbits: int = 8
+    hnsw_threshold: int = 2_000
+    ivf_threshold: int = 50_000
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 80
+    hnsw_ef_search: int = 64
+    ivf_nlist: int | None = None
+    ivf_nprobe: int = 32
+
+
+QUANTIZATION_MODES = ("float32", "float16", "sq8", "pq")
+
+
+@dataclass
+class RecallResult:
+    index_type: str
+    recall: float
+    avg_latency_ms: float
+
+
+@dataclass
+class QuantizationResult:
+    quantization: str
+    index_type: str
+    index_bytes: int
+    recall: float
+
+
+def _codec(num_vectors: int, config: IndexConfig, quantization: str) -> str:
+    if quantization == "float32":
+        return "Flat"
+    if quantization == "float16":
+        return "SQfp16"
+    if quantization == "sq8":
+        return "SQ8"
+    if quantization == "pq":
+        if num_vectors < 39 * 2 ** config.pq_nbits:
+            return "SQ8"
+        return f"PQ{config.pq_m}x{config.pq_nbits}"
+    raise ValueError(f"Unsupported quantization '{quantization}', expected one of {QUANTIZATION_MODES}")
+
+
+def config_description(config: IndexConfig) -> str:
+    """
+    Return stable description of all index settings. Unlike `index_description` it does not depend on the corpus size,
+    so it can be a part of the key of a stored index before the document is indexed.
+    """
+    return ",".join(f"{name}={value}" for name, value in sorted(asdict(config).items()))
+
+
+def index_description(num_vectors: int, config: IndexConfig, quantization: str | None = None) -> str:
+    """Return FAISS index factory description for the corpus size and quantization mode."""
+    codec = _codec(num_vectors, config, quantization or config.quantization)
+    if num_vectors < config.hnsw_threshold:
+        return codec
+    if num_vectors < config.ivf_threshold:
+        return f"HNSW{config.hnsw_m},{codec}"
+    nlist = config.ivf_nlist or int(4 * math.sqrt(num_vectors))
+    return f"IVF{nlist},{codec}"
+
+
+def build_index(embeddings: np.ndarray, config: IndexConfig, description: str | None = None) -> Any:
+    """
+    Build FAISS index for embeddings, choosing index type from their count.
+
+    Args:
+        embeddings: float32 matrix of shape (n, dim)
+        config: Index configuration
+        description: Explicit FAISS index factory description, overrides choice by corpus size
+
+    Returns:
+        Trained FAISS index with all embeddings added
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    num_vectors, dimension = embeddings.shape
+    description = description or index_description(num_vectors, config)
+
+    index = faiss.index_factory(dimension, description, faiss.METRIC_L2)
+    if description.startswith("HNSW"):
+        index.hnsw.efConstruction = config.hnsw_ef_construction
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+
+    parameter_space = faiss.ParameterSpace()
+    if description.startswith("HNSW"):
+        parameter_space.set_index_parameter(index, "efSearch", config.hnsw_ef_search)
+    elif description.startswith("IVF"):
+        parameter_space.set_index_parameter(index, "nprobe", config.ivf_nprobe)
+    return index
+
+
+def finalize_index(flat_index: Any, config: IndexConfig) -> Any:
+    """
+    Convert incrementally built flat index into the index type configured for its final size.
+
+    Args:
+        flat_index: `IndexFlatL2` with all vectors added
+        config: Index configuration
+
+    Returns:
+        The same index if flat float32 storage is configured for this size, otherwise a rebuilt index
+    """
+    description = index_description(flat_index.ntotal, config)
+    if description == "Flat":
+        return flat_index
+    return build_index(flat_index.reconstruct_n(0, flat_index.ntotal), config, description)
+
+
+def recall_report(embeddings: np.ndarray, queries: np.ndarray, config: IndexConfig, k: int = 3) -> list[RecallResult]:
+    """
+    Compare approximate index types against exact search on the same corpus.
+
+    Args:
+        embeddings: float32 corpus matrix of shape (n, dim)
+        queries: float32 query matrix of shape (q, dim)
+        config: Index configuration, its HNSW/IVF parameters are used for the approximate indexes
+        k: Number of neighbours
+
+    Returns:
+        Recall@k (relative to `Flat`) and average per-query latency for each index type
+    """
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    nlist = config.ivf_nlist or int(4 * math.sqrt(len(embeddings)))
+    descriptions = ["Flat", f"HNSW{config.hnsw_m},Flat", f"IVF{nlist},Flat"]
+
+    results: list[RecallResult] = []
+    ground_truth = None
+    for description in descriptions:
+        index = build_index(embeddings, config, description)
+
+        start = time.perf_counter()
+        _, indices = index.search(queries, k=k)
+        avg_latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        if ground_truth is None:
+            ground_truth = indices
+        found = sum(len(set(row) & set(expected)) for row, expected in zip(indices, ground_truth))
+        results.append(RecallResult(description, found / ground_truth.size, avg_latency_ms))
+
+    return results
+
+
+def format_recall_report(results: list[RecallResult]) -> str:
+    """Render recall report as markdown table."""
+    lines = ["| Index | Recall | Avg latency, ms |", "|---|---|---|"]
+    for result in results:
+        lines.append(f"| {result.index_type} | {result.recall:.3f} | {result.avg_latency_ms:.3f} |")
+    return "\n".join(lines)
+
+
+def quantization_report(
+        embeddings: np.ndarray,
+        queries: np.ndarray,
+        config: IndexConfig,
+        k: int = 3,
+) -> list[QuantizationResult]:
+    """
+    Measure memory per document and recall loss of every quantization mode.
+
+    Args:
+        embeddings: float32 matrix of one document's chunk embeddings, shape (n, dim)
+        queries: float32 query matrix of shape (q, dim)
+        config: Index configuration, index type is chosen from the corpus size as in `build_index`
+        k: Number of neighbours
+
+    Returns:
+        Serialized index size and recall@k (relative to exact float32 search) for each quantization mode
+    """
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    _, ground_truth = build_index(embeddings, config, "Flat").search(queries, k=k)
+
+    results: list[QuantizationResult] = []
+    for quantization in QUANTIZATION_MODES:
+        description = index_description(len(embeddings), config, quantization)
+        index = build_index(embeddings, config, description)
+        _, indices = index.search(queries, k=k)
+        found = sum(len(set(row) & set(expected)) for row, expected in zip(indices, ground_truth))
+        results.append(
+            QuantizationResult(
+                quantization=quantization,
+                index_type=description,
+                index_bytes=len(faiss.serialize_index(index)),
+                recall=found / ground_truth.size,
+            )
+        )
+
+    return results
+
+
+def format_quantization_report(results: list[QuantizationResult]) -> str:
+    """Render quantization report as markdown table."""
+    lines = ["| Quantization | Index | Bytes per document | Recall |", "|---|---|---|---|"]
+    for result in results:
+        lines.append(f"| {result.quantization} | {result.index_type} | {result.index_bytes} | {result.recall:.3f} |")
+    return "\n".join(lines)
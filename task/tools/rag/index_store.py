@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Tuple
+
+import faiss
+
+
+class IndexStore:
+    """
+    Persistent, content-addressed store of FAISS indexes and their chunks.
+
+    Entries are keyed by SHA-256 of the original file bytes and the index settings, so the same document uploaded in
+    different conversations (or after a worker restart) is indexed only once, and an index built with another
+    embedding model or index config is never reused. Indexes are memory-mapped on load.
+    """
+
+    _INDEX_FILE = "index.faiss"
+    _CHUNKS_FILE = "chunks.json"
+
+    def __init__(self, root_dir: str):
+        self._root = Path(root_dir)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(file_content: bytes, index_settings: str = '') -> str:
+        """
+        Return the content address (hex SHA-256) for file bytes and the settings the index is built with
+        (e.g. embedding model name and `config_description`).
+        """
+        digest = hashlib.sha256(file_content)
+        if index_settings:
+            digest.update(b'\0' + index_settings.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self._root / key[:2] / key
+
+    def load(self, key: str) -> Tuple[Any, list[str]] | None:
+        """
+        Load a stored entry.
+
+        Args:
+            key: Content hash of the document
+
+        Returns:
+            Tuple of (index, chunks) if stored, None otherwise
+        """
+        entry_dir = self._entry_dir(key)
+        index_path = entry_dir / self._INDEX_FILE
+        chunks_path = entry_dir / self._CHUNKS_FILE
+        if not index_path.exists() or not chunks_path.exists():
+            return None
+
+        try:
+            index = self._read_index(index_path)
+            with open(chunks_path, 'r', encoding='utf-8') as f:
+                chunks = json.load(f)
+        except Exception as e:
+            print(f"[IndexStore] Unable to load entry {key}: {e}")
+            return None
+
+        return index, chunks
+
+    def save(self, key: str, index: Any, chunks: list[str]) -> None:
+        """
+        Persist an entry. Writes go to a temporary directory that is atomically moved in place, so concurrent
+        writers of the same document never leave a half-written entry behind.
+
+        Args:
+            key: Content hash of the document
+            index: FAISS index
+            chunks: Document chunks
+        """
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=entry_dir.parent))
+        try:
+            faiss.write_index(index, str(tmp_dir / self._INDEX_FILE))
+            with open(tmp_dir / self._CHUNKS_FILE, 'w', encoding='utf-8') as f:
+                json.dump(chunks, f, ensure_ascii=False)
+            with self._lock:
+                os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another writer has already stored the same content
+            pass
+        finally:
+            if tmp_dir.exists():
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def delete(self, key: str) -> None:
+        """Remove a stored entry."""
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def __contains__(self, key: str) -> bool:
+        return (self._entry_dir(key) / self._INDEX_FILE).exists()
+
+    @staticmethod
+    def _read_index(index_path: Path) -> Any:
+        # `IO_FLAG_MMAP_IFC` maps the codes of flat, scalar/product quantizer and HNSW indexes, `IO_FLAG_MMAP` maps the
+        # inverted lists of IVF indexes. Both flags together are rejected for IVF indexes, so they are tried in turn
+        for io_flags in (
+            faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+            faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+        ):
+            try:
+                return faiss.read_index(str(index_path), io_flags)
+            except RuntimeError:
+                pass
+        # Not every index type supports memory mapping
+        return faiss.read_index(str(index_path))
@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Iterator
+
+import faiss
+import numpy as np
+
+from task.tools.rag.text_splitter import RecursiveTextSplitter
+
+_DONE = object()
+
+
+class IndexingPipeline:
+    """
+    Streaming extract -> split -> embed -> index pipeline.
+
+    Stages run concurrently and are connected with bounded queues:
+    1. pages are pulled from the text iterator and split into chunks in the executor,
+    2. chunk batches are embedded,
+    3. vectors are added to a growing flat index in the executor.
+    Extraction of the next pages overlaps with embedding of the previous ones, and only `queue_size` batches of
+    intermediate data are held at any time. Once all chunks are indexed, `finalize_index` may rebuild the flat index
+    into the type configured for the corpus size (HNSW/IVF/quantized).
+    """
+
+    def __init__(
+            self,
+            text_splitter: RecursiveTextSplitter,
+            embed: Callable[[list[str]], Awaitable[np.ndarray]],
+            finalize_index: Callable[[Any], Any],
+            executor: Executor,
+            batch_size: int = 64,
+            queue_size: int = 4,
+    ):
+        self._text_splitter = text_splitter
+        self._embed = embed
+        self._finalize_index = finalize_index
+        self._executor = executor
+        self._batch_size = batch_size
+        self._queue_size = queue_size
+
+    async def run(self, pages: Iterator[str]) -> tuple[Any, list[str]] | None:
+        """
+        Index text pages.
+
+        Args:
+            pages: Lazy iterator of document text parts (e.g. PDF pages)
+
+        Returns:
+            Tuple of (index, chunks), None if document has no text
+        """
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        vector_queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        chunks: list[str] = []
+
+        tasks = [
+            asyncio.create_task(self._split_stage(pages, chunk_queue)),
+            asyncio.create_task(self._embed_stage(chunk_queue, vector_queue)),
+            asyncio.create_task(self._index_stage(vector_queue, chunks)),
+        ]
+        try:
+            *_, index = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        if index is None:
+            return None
+        index = await self._run_in_executor(self._finalize_index, index)
+        return index, chunks
+
+    async def _split_stage(self, pages: Iterator[str], chunk_queue: asyncio.Queue) -> None:
+        batches = self._iter_chunk_batches(pages)
+        while (batch := await self._run_in_executor(next, batches, None)) is not None:
+            await chunk_queue.put(batch)
+        await chunk_queue.put(_DONE)
+
+    async def _embed_stage(self, chunk_queue: asyncio.Queue, vector_queue: asyncio.Queue) -> None:
+        while (batch := await chunk_queue.get()) is not _DONE:
+            embeddings = await self._embed(batch)
+            await vector_queue.put((batch, embeddings))
+        await vector_queue.put(_DONE)
+
+    async def _index_stage(self, vector_queue: asyncio.Queue, chunks: list[str]) -> Any:
+        index = None
+        while (item := await vector_queue.get()) is not _DONE:
+            batch, embeddings = item
+            embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+            if index is None:
+                index = faiss.IndexFlatL2(embeddings.shape[1])
+            await self._run_in_executor(index.add, embeddings)
+            chunks.extend(batch)
+        return index
+
+    def _iter_chunk_batches(self, pages: Iterator[str]) -> Iterator[list[str]]:
+        """
+        Split streamed pages into batches of chunks. The last chunk of every split is carried over and re-split
+        together with the next page, so chunks are not cut at page boundaries.
+        """
+        pending: list[str] = []
+        carry = ''
+        for page in pages:
+            if not page:
+                continue
+            page_chunks = self._text_splitter.split_text(f"{carry}\n{page}" if carry else page)
+            if not page_chunks:
+                continue
+            carry = page_chunks.pop()
+            pending.extend(page_chunks)
+            while len(pending) >= self._batch_size:
+                yield pending[:self._batch_size]
+                pending = pending[self._batch_size:]
+
+        if carry:
+            pending.append(carry)
+        for start in range(0, len(pending), self._batch_size):
+            yield pending[start:start + self._batch_size]
+
+    async def _run_in_executor(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
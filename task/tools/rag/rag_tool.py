@@ -1,22 +1,44 @@
+import asyncio
 import json
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
 
-import faiss
 import numpy as np
 from aidial_client import AsyncDial
 from aidial_sdk.chat_completion import Message, Role
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from sentence_transformers import SentenceTransformer
 
 from task.tools.base import BaseTool
 from task.tools.models import ToolCallParams
+from task.tools.rag.chunk_embedding_cache import ChunkEmbeddingCache
 from task.tools.rag.document_cache import DocumentCache
+from task.tools.rag.embedding_service import EmbeddingService
+from task.tools.rag.index_factory import IndexConfig, config_description, finalize_index
+from task.tools.rag.index_store import IndexStore
+from task.tools.rag.indexing_pipeline import IndexingPipeline
+from task.tools.rag.text_splitter import RecursiveTextSplitter
 from task.utils.dial_file_conent_extractor import DialFileContentExtractor
+from task.utils.file_content_cache import FileContentCache
+from task.utils.http_client_pool import HttpClientPool
+from task.utils.pdf_text_extractor import PdfTextExtractor
 
-# TODO: provide system prompt for Generation step
 _SYSTEM_PROMPT = """
+You are a document assistant. You answer the user's question using ONLY the provided context that was retrieved
+from the documents. Every context fragment is marked with its source file.
+
+Rules:
+- If the context contains the answer, answer concisely and precisely, quoting numbers, names and steps exactly.
+- If the context only partially covers the question, answer what is covered and state what is missing.
+- If the context does not contain the answer, say that the document does not contain this information.
+- When there are several questions, answer each of them separately.
+- When fragments come from several files, mention which file each fact comes from.
+- Never invent facts that are not present in the context.
 """
 
+_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+_API_VERSION = '2025-01-01-preview'
+
 
 class RagTool(BaseTool):
     """
@@ -24,82 +46,294 @@ class RagTool(BaseTool):
     Supports: PDF, TXT, CSV, HTML.
     """
 
-    def __init__(self, endpoint: str, deployment_name: str, document_cache: DocumentCache):
-        #TODO:
-        # 1. Set endpoint
-        # 2. Set deployment_name
-        # 3. Set document_cache. DocumentCache is implemented, relate to it as to centralized Dict with file_url (as key),
-        #    and indexed embeddings (as value), that have some autoclean. This cache will allow us to speed up RAG search.
-        # 4. Create SentenceTransformer and set is as `model` with:
-        #   - model_name_or_path='all-MiniLM-L6-v2', it is self hosted lightwait embedding model.
-        #     More info: https://medium.com/@rahultiwari065/unlocking-the-power-of-sentence-embeddings-with-all-minilm-l6-v2-7d6589a5f0aa
-        #   - Optional! You can set it use CPU forcefully with `device='cpu'`, in case if not set up then will use GPU if it has CUDA cores
-        # 5. Create RecursiveCharacterTextSplitter as `text_splitter` with:
-        #   - chunk_size=500
-        #   - chunk_overlap=50
-        #   - length_function=len
-        #   - separators=["\n\n", "\n", ". ", " ", ""]
-        raise NotImplementedError()
+    def __init__(
+            self,
+            endpoint: str,
+            deployment_name: str,
+            document_cache: DocumentCache,
+            index_store: IndexStore,
+            file_content_cache: FileContentCache,
+            pdf_extractor: PdfTextExtractor | None = None,
+            executor_workers: int = 2,
+            embedding_batch_size: int = 64,
+            embedding_max_wait_ms: float = 10,
+            index_config: IndexConfig | None = None,
+            chunk_embedding_cache: ChunkEmbeddingCache | None = None,
+            http_client_pool: HttpClientPool | None = None,
+    ):
+        """
+        :param file_content_cache: downloads shared with other tools, an attachment read by several tools in the same
+            turn is downloaded once.
+        :param pdf_extractor: PDF text extraction backend, shared with FileContentExtractionTool.
+        :param executor_workers: size of the dedicated thread pool that runs extraction, embedding and FAISS work,
+            the event loop only awaits results so other chat streams are not blocked while a document is indexed.
+        :param embedding_batch_size: max number of texts (from all concurrent calls) encoded in one forward pass.
+        :param embedding_max_wait_ms: max time to wait for concurrent encode requests to fill a batch.
+        :param index_config: thresholds and parameters for choosing exact (Flat) or approximate (HNSW/IVF) index.
+        :param chunk_embedding_cache: embeddings of chunks by text hash, re-indexing an edited document embeds only
+            new or changed chunks.
+        :param http_client_pool: shared DIAL connections for the generation call, a new client per call if absent.
+        """
+        self.endpoint = endpoint
+        self.deployment_name = deployment_name
+        self.document_cache = document_cache
+        self.index_store = index_store
+        self.file_content_cache = file_content_cache
+        self.pdf_extractor = pdf_extractor
+        self.http_client_pool = http_client_pool
+        self.model = SentenceTransformer(model_name_or_path=_EMBEDDING_MODEL, device='cpu')
+        self.text_splitter = RecursiveTextSplitter(
+            chunk_size=500,
+            chunk_overlap=50,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+        self.index_config = index_config or IndexConfig()
+        # Stored indexes are keyed by content and these settings, changing any of them re-indexes documents
+        self._index_settings = f"{_EMBEDDING_MODEL};{config_description(self.index_config)}"
+        self.chunk_embedding_cache = chunk_embedding_cache or ChunkEmbeddingCache()
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="RagTool")
+        self.embedding_service = EmbeddingService(
+            model=self.model,
+            executor=self._executor,
+            max_batch_size=embedding_batch_size,
+            max_wait_ms=embedding_max_wait_ms,
+        )
+        self.indexing_pipeline = IndexingPipeline(
+            text_splitter=self.text_splitter,
+            embed=self._embed_chunks,
+            finalize_index=partial(finalize_index, config=self.index_config),
+            executor=self._executor,
+            batch_size=embedding_batch_size,
+        )
 
     @property
     def show_in_stage(self) -> bool:
-        # TODO: set as False since we will have custom variant of representation in Stage
-        raise NotImplementedError()
+        return False
+
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+    @property
+    def timeout(self) -> float | None:
+        # Indexing of a large document can take minutes
+        return 300.0
 
     @property
     def name(self) -> str:
-        # TODO: provide self-descriptive name
-        raise NotImplementedError()
+        return "rag_search"
 
     @property
     def description(self) -> str:
-        # TODO: provide tool description that will help LLM to understand when to use this tools and cover 'tricky'
-        #  moments (not more 1024 chars)
-        raise NotImplementedError()
+        return (
+            "Performs semantic (RAG) search inside attached documents and answers the question based on the most "
+            "relevant fragments. Supports PDF, TXT, CSV and HTML files. Use it for specific questions about large "
+            "documents instead of reading them page by page with file content extraction. When the question spans "
+            "several attachments, pass all their URLs in ONE call: fragments from all files are ranked together and "
+            "the answer cites the source file. Documents are indexed on the first call, repeated calls are fast. "
+            "Provide a precise, self-contained question and the exact file URLs from the conversation attachments."
+        )
 
     @property
     def parameters(self) -> dict[str, Any]:
-        # TODO: provide tool parameters JSON Schema:
-        #  - request is string, description: "The search query or question to search for in the document", required
-        #  - file_url is string, required
-        raise NotImplementedError()
-
+        return {
+            "type": "object",
+            "properties": {
+                "requests": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "The search queries or questions to search for in the documents. Put all related "
+                                   "questions about the same documents into one call"
+                },
+                "file_urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "URLs of the attached files to search in"
+                }
+            },
+            "required": ["requests", "file_urls"]
+        }
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
-        #TODO:
-        # 1. Load arguments with `json`
-        # 2. Get `request` from arguments
-        # 3. Get `file_url` from arguments
-        # 4. Get stage from `tool_call_params`
-        # 5. Append content to stage: "## Request arguments: \n"
-        # 6. Append content to stage: `f"**Request**: {request}\n\r"`
-        # 7. Append content to stage: `f"**File URL**: {file_url}\n\r"`
-        # 8. Create `cache_document_key`, it is string from `conversation_id` and `file_url`, with such key we guarantee
-        #    access to cached indexes for one particular conversation,
-        # 9. Get from `document_cache` by `cache_document_key` a cache
-        # 10. If cache is present then set it as `index, chunks = cached_data` (cached_data is retrieved cache from 9 step),
-        #     otherwise:
-        #       - Create DialFileContentExtractor and extract text by `file_url` as `text_content`
-        #       - If no `text_content` then appen to stage info about it ans return the string with the error that file content is not found
-        #       - Create `chunks` with `text_splitter`
-        #       - Create `embeddings` with `model`
-        #       - Create IndexFlatL2 with `384` dimensions as `index` (more about IndexFlatL2 https://shayan-fazeli.medium.com/faiss-a-quick-tutorial-to-efficient-similarity-search-595850e08473)
-        #       - Add to `index` np.array with created embeddings as type 'float32'
-        #       - Add to `document_cache`
-        # 11. Prepare `query_embedding` with model. You need to encode request as type 'float32'
-        # 12. Through created index make search with `query_embedding`, `k` set as 3. As response we expect tuple of
-        #     `distances` and `indices`
-        # 13. Now you need to iterate through `indices[0]` and and by each idx get element from `chunks`, result save as `retrieved_chunks`
-        # 14. Make augmentation
-        # 15. Append content to stage: "## RAG Request: \n"
-        # 16. Append content to stage: `ff"```text\n\r{augmented_prompt}\n\r```\n\r"` (will be shown as markdown text)
-        # 17. Append content to stage: "## Response: \n"
-        # 18. Now make Generation with AsyncDial (don't forget about api_version '025-01-01-preview, provide LLM with system prompt and augmented prompt and:
-        #   - stream response to stage (user in real time will be able to see what the LLM responding while Generation step)
-        #   - collect all content (we need to return it as tool execution result)
-        # 19. return collected content
-        raise NotImplementedError()
-
-    def __augmentation(self, request: str, chunks: list[str]) -> str:
-        #TODO: make prompt augmentation
-        raise NotImplementedError()
+        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        requests = self._as_list(arguments.get("requests") or arguments.get("request"))
+        file_urls = self._as_list(arguments.get("file_urls") or arguments.get("file_url"))
+
+        stage = tool_call_params.stage
+        if not requests or not file_urls:
+            missing_argument = "requests" if not requests else "file_urls"
+            stage.append_content(f"Missing argument: {missing_argument}\n\r")
+            return f"Error: `{missing_argument}` must be a non-empty array of strings."
+
+        stage.append_content("## Request arguments: \n")
+        for request in requests:
+            stage.append_content(f"**Request**: {request}\n\r")
+        for file_url in file_urls:
+            stage.append_content(f"**File URL**: {file_url}\n\r")
+
+        indexed_documents = await asyncio.gather(
+            *[self._get_document(file_url, tool_call_params) for file_url in file_urls]
+        )
+        documents = []
+        for file_url, indexed_document in zip(file_urls, indexed_documents):
+            if indexed_document:
+                documents.append((file_url, *indexed_document))
+            else:
+                stage.append_content(f"File content not found: {file_url}\n\r")
+
+        if not documents:
+            stage.append_content("## Response: \n")
+            stage.append_content("File content not found.\n\r")
+            return "Error: File content not found."
+
+        query_embeddings = await self.embedding_service.encode(requests)
+        top_k = min(3 * len(documents), 10)
+        retrieved_chunks = await self._run_in_executor(self._search, documents, query_embeddings, top_k)
+
+        augmented_prompt = self.__augmentation(requests, retrieved_chunks)
+
+        stage.append_content("## RAG Request: \n")
+        stage.append_content(f"```text\n\r{augmented_prompt}\n\r```\n\r")
+        stage.append_content("## Response: \n")
+
+        client = self._dial_client(tool_call_params.api_key)
+        chunks_stream = await client.chat.completions.create(
+            messages=[
+                {"role": Role.SYSTEM.value, "content": _SYSTEM_PROMPT},
+                {"role": Role.USER.value, "content": augmented_prompt},
+            ],
+            deployment_name=self.deployment_name,
+            stream=True,
+            api_version=_API_VERSION,
+        )
+
+        content = ''
+        async for chunk in chunks_stream:
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                delta_content = chunk.choices[0].delta.content
+                stage.append_content(delta_content)
+                content += delta_content
+
+        return content
+
+    @staticmethod
+    def _as_list(value: str | list[str] | None) -> list[str]:
+        """
+        Models sometimes pass a single string instead of an array, wrap it and drop empty values and duplicates keeping
+        order. A missing value gives an empty list.
+        """
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [item for item in dict.fromkeys(value) if item]
+
+    def _dial_client(self, api_key: str) -> AsyncDial:
+        if self.http_client_pool:
+            return self.http_client_pool.dial(api_key)
+        return AsyncDial(base_url=self.endpoint, api_key=api_key, api_version=_API_VERSION)
+
+    async def _get_document(self, file_url: str, tool_call_params: ToolCallParams) -> tuple[Any, list[str]] | None:
+        """Get index and chunks of the document from cache, index store, or index it."""
+        cache_document_key = f"{tool_call_params.conversation_id}_{file_url}"
+        cached_data = self.document_cache.get(cache_document_key)
+        if cached_data:
+            return cached_data
+
+        extractor = DialFileContentExtractor(tool_call_params.api_key, self.file_content_cache, self.pdf_extractor)
+        filename, file_content = await extractor.download(file_url)
+
+        # Indexes are stored by content, so the same document is embedded only once across conversations
+        content_key = IndexStore.content_hash(file_content, self._index_settings)
+        stored_data = await self._run_in_executor(self.index_store.load, content_key)
+        if stored_data:
+            index, chunks = stored_data
+        else:
+            # Extraction errors propagate from the pipeline, an index of a partially extracted document is never saved
+            pages = extractor.iter_text_from_content(file_content, filename)
+            indexed_data = await self.indexing_pipeline.run(pages)
+            if not indexed_data:
+                return None
+
+            index, chunks = indexed_data
+            await self._run_in_executor(self.index_store.save, content_key, index, chunks)
+
+        self.document_cache.set(cache_document_key, index, chunks)
+        return index, chunks
+
+    async def _embed_chunks(self, chunks: list[str]) -> np.ndarray:
+        """Embed chunks, reusing cached embeddings of chunks with the same text."""
+        keys = [ChunkEmbeddingCache.chunk_hash(chunk) for chunk in chunks]
+        cached_embeddings = self.chunk_embedding_cache.get_many(keys)
+
+        missing_positions = [position for position, embedding in enumerate(cached_embeddings) if embedding is None]
+        if not missing_positions:
+            return np.stack(cached_embeddings)
+
+        new_embeddings = await self.embedding_service.encode([chunks[position] for position in missing_positions])
+        self.chunk_embedding_cache.set_many([keys[position] for position in missing_positions], new_embeddings)
+        if len(missing_positions) == len(chunks):
+            return new_embeddings
+
+        embeddings = np.empty((len(chunks), new_embeddings.shape[1]), dtype='float32')
+        for position, embedding in enumerate(cached_embeddings):
+            if embedding is not None:
+                embeddings[position] = embedding
+        embeddings[missing_positions] = new_embeddings
+        return embeddings
+
+    async def _run_in_executor(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    @staticmethod
+    def _search(
+            documents: list[tuple[str, Any, list[str]]],
+            query_embeddings: np.ndarray,
+            k: int,
+    ) -> list[tuple[str, str]]:
+        """
+        Search all document indexes with the matrix of embedded queries (one `index.search` per document), merge
+        results into global top-k per query and deduplicate fragments retrieved by several queries.
+        Blocking, runs in the executor.
+
+        :return: list of (file_url, chunk) ordered by best distance to any query
+        """
+        num_queries = len(query_embeddings)
+        distances = np.full((num_queries, len(documents), k), np.inf, dtype='float32')
+        indices = np.full((num_queries, len(documents), k), -1, dtype='int64')
+        for position, (_, index, _) in enumerate(documents):
+            k_document = min(k, index.ntotal)
+            document_distances, document_indices = index.search(query_embeddings, k=k_document)
+            distances[:, position, :k_document] = document_distances
+            indices[:, position, :k_document] = document_indices
+
+        # Missing neighbours (-1) keep infinite distance and are filtered out after the global ranking
+        distances[indices < 0] = np.inf
+        distances = distances.reshape(num_queries, -1)
+        indices = indices.reshape(num_queries, -1)
+        top_positions = np.argsort(distances, axis=1, kind='stable')[:, :k]
+
+        best_distances: dict[tuple[int, int], float] = {}
+        for query_position, flat_positions in enumerate(top_positions):
+            for flat_position in flat_positions:
+                chunk_idx = int(indices[query_position, flat_position])
+                if chunk_idx < 0:
+                    continue
+                key = (int(flat_position) // k, chunk_idx)
+                distance = float(distances[query_position, flat_position])
+                if key not in best_distances or distance < best_distances[key]:
+                    best_distances[key] = distance
+
+        retrieved_chunks = []
+        for document_position, chunk_idx in sorted(best_distances, key=best_distances.get):
+            file_url, _, chunks = documents[document_position]
+            retrieved_chunks.append((file_url, chunks[chunk_idx]))
+        return retrieved_chunks
+
+    def __augmentation(self, requests: list[str], chunks: list[tuple[str, str]]) -> str:
+        context = "\n\n---\n\n".join(f"[Source: {file_url}]\n{chunk}" for file_url, chunk in chunks)
+        return (
+            f"## Context retrieved from the documents:\n{context}\n\n"
+            f"## Questions:\n" + "\n".join(f"- {request}" for request in requests)
+        )
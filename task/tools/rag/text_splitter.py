@@ -0,0 +1,100 @@
+from collections import deque
+from typing import Iterator
+
+
+class RecursiveTextSplitter:
+    """
+    Splits text into chunks of less than `chunk_size` characters with `chunk_overlap` characters of overlap.
+
+    Has the same separator-priority semantics and output as langchain's `RecursiveCharacterTextSplitter` with default
+    `keep_separator=True` and `strip_whitespace=True`: the first separator found in the text splits it, separators are
+    kept at the start of the next piece, pieces shorter than `chunk_size` are merged into chunks, longer pieces are split
+    recursively with the next separators. Unlike langchain, it works on (start, end) offsets into the original text in
+    one pass per recursion level, and slices a string only for every produced chunk.
+    """
+
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, separators: list[str] | None = None):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must not be larger than chunk_size ({chunk_size})")
+        self._chunk_size = chunk_size
+        self._chunk_overlap = chunk_overlap
+        self._separators = separators or ["\n\n", "\n", " ", ""]
+
+    def split_text(self, text: str) -> list[str]:
+        chunks: list[str] = []
+        self._split(text, 0, len(text), self._separators, chunks)
+        return chunks
+
+    def _split(self, text: str, start: int, end: int, separators: list[str], chunks: list[str]) -> None:
+        separator = separators[-1]
+        new_separators: list[str] = []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        good_splits: list[tuple[int, int]] = []
+        for split_start, split_end in self._iter_splits(text, start, end, separator):
+            if split_end - split_start < self._chunk_size:
+                good_splits.append((split_start, split_end))
+                continue
+
+            if good_splits:
+                self._merge_splits(text, good_splits, chunks)
+                good_splits = []
+            if not new_separators:
+                chunks.append(text[split_start:split_end])
+            else:
+                self._split(text, split_start, split_end, new_separators, chunks)
+
+        if good_splits:
+            self._merge_splits(text, good_splits, chunks)
+
+    @staticmethod
+    def _iter_splits(text: str, start: int, end: int, separator: str) -> Iterator[tuple[int, int]]:
+        """Yield non-empty pieces of text[start:end], every piece except the first starts with the separator."""
+        if not separator:
+            for position in range(start, end):
+                yield position, position + 1
+            return
+
+        split_start = start
+        position = text.find(separator, start, end)
+        while position != -1:
+            if position > split_start:
+                yield split_start, position
+            split_start = position
+            position = text.find(separator, position + len(separator), end)
+        if end > split_start:
+            yield split_start, end
+
+    def _merge_splits(self, text: str, splits: list[tuple[int, int]], chunks: list[str]) -> None:
+        """
+        Merge consecutive pieces into chunks. Pieces are adjacent in the text, so a chunk is the slice from the start of
+        its first piece to the end of its last one.
+        """
+        current: deque[tuple[int, int]] = deque()
+        total = 0
+        for split_start, split_end in splits:
+            length = split_end - split_start
+            if total + length > self._chunk_size and current:
+                self._append_chunk(text, current[0][0], current[-1][1], chunks)
+                # Keep the tail of the previous chunk as overlap, as long as the next piece still fits
+                while total > self._chunk_overlap or (total + length > self._chunk_size and total > 0):
+                    first_start, first_end = current.popleft()
+                    total -= first_end - first_start
+            current.append((split_start, split_end))
+            total += length
+
+        if current:
+            self._append_chunk(text, current[0][0], current[-1][1], chunks)
+
+    @staticmethod
+    def _append_chunk(text: str, start: int, end: int, chunks: list[str]) -> None:
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from task.utils.cache_stats import CacheStats
+
+
+@dataclass
+class _ResultEntry:
+    content: str
+    expires_at: float
+    size_bytes: int
+
+
+class ToolResultCache:
+    """
+    Memory-bounded cache of tool results scoped to a conversation.
+
+    Results are keyed by tool name, canonical JSON of the arguments (key order and whitespace do not matter) and
+    conversation id. Every tool has its own TTL and max number of entries (see `BaseTool.cache_ttl` and
+    `BaseTool.cache_max_entries`), all tools share the `max_bytes` budget evicted in LRU order.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self._entries: OrderedDict[tuple[str, str], _ResultEntry] = OrderedDict()
+        self._tool_keys: dict[str, OrderedDict[str, None]] = {}
+        self._max_bytes = max_bytes
+        self._resident_bytes = 0
+        self._stats = CacheStats(max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(arguments: str, conversation_id: str | None) -> str | None:
+        """
+        Build cache key from raw tool call arguments.
+
+        Returns:
+            Key, None if results can't be cached (no conversation or arguments are not valid JSON)
+        """
+        if not conversation_id:
+            return None
+        try:
+            canonical_arguments = json.dumps(
+                json.loads(arguments or '{}'), sort_keys=True, separators=(',', ':'), ensure_ascii=False
+            )
+        except json.JSONDecodeError:
+            return None
+        return hashlib.sha256(f"{conversation_id}\n{canonical_arguments}".encode('utf-8')).hexdigest()
+
+    def get(self, tool_name: str, key: str) -> str | None:
+        """
+        Retrieve a cached result and mark it as most recently used.
+
+        Args:
+            tool_name: Name of the tool
+            key: Key from `make_key`
+
+        Returns:
+            Result if found and not expired, None otherwise
+        """
+        entry = self._entries.get((tool_name, key))
+        if entry is None:
+            self._stats.misses += 1
+            return None
+
+        if time.monotonic() >= entry.expires_at:
+            self._remove(tool_name, key)
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end((tool_name, key))
+        self._tool_keys[tool_name].move_to_end(key)
+        self._stats.hits += 1
+        return entry.content
+
+    def set(self, tool_name: str, key: str, content: str, ttl: float, max_entries: int) -> None:
+        """
+        Store a result, evicting least recently used results of the tool beyond `max_entries` and of all tools if
+        the byte budget is exceeded.
+
+        Args:
+            tool_name: Name of the tool
+            key: Key from `make_key`
+            content: Tool result
+            ttl: Time to live in seconds
+            max_entries: Max number of cached results of this tool
+        """
+        size_bytes = sys.getsizeof(content)
+        if size_bytes > self._max_bytes:
+            return
+
+        self._remove(tool_name, key)
+        self._entries[(tool_name, key)] = _ResultEntry(content, time.monotonic() + ttl, size_bytes)
+        tool_keys = self._tool_keys.setdefault(tool_name, OrderedDict())
+        tool_keys[key] = None
+        self._resident_bytes += size_bytes
+
+        while len(tool_keys) > max_entries:
+            self._remove(tool_name, next(iter(tool_keys)))
+            self._stats.evictions += 1
+        while self._resident_bytes > self._max_bytes:
+            evicted_tool_name, evicted_key = next(iter(self._entries))
+            self._remove(evicted_tool_name, evicted_key)
+            self._stats.evictions += 1
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of cache counters."""
+        return CacheStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self._stats.evictions,
+            expirations=self._stats.expirations,
+            entries=len(self._entries),
+            resident_bytes=self._resident_bytes,
+            max_bytes=self._max_bytes,
+        )
+
+    def clear(self) -> None:
+        """Clear all cached results."""
+        self._entries.clear()
+        self._tool_keys.clear()
+        self._resident_bytes = 0
+
+    def _remove(self, tool_name: str, key: str) -> None:
+        entry = self._entries.pop((tool_name, key), None)
+        if entry is None:
+            return
+        self._resident_bytes -= entry.size_bytes
+        tool_keys = self._tool_keys[tool_name]
+        del tool_keys[key]
+        if not tool_keys:
+            del self._tool_keys[tool_name]
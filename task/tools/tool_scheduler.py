@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+from dataclasses import dataclass
+
+from aidial_client.types.chat.legacy.chat_completion import Role
+from aidial_sdk.chat_completion import Message
+from pydantic import StrictStr
+
+from task.tools.base import BaseTool
+from task.tools.models import ToolCallParams
+
+
+@dataclass
+class SchedulerStats:
+    running: int = 0
+    waiting: int = 0
+    completed: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+
+
+class ToolScheduler:
+    """
+    Runs tool calls of all requests under shared concurrency limits.
+
+    Every call takes a slot of its tool (`BaseTool.max_concurrency`, unlimited if None) and then a global slot
+    (`max_concurrency`), so calls waiting for a busy tool do not hold global slots. Execution is limited by
+    `BaseTool.timeout` (`default_timeout` if None), a timed-out call is cancelled and returns a tool error message.
+    Cancellation of the caller (e.g. an aborted request) cancels the running call and releases its slots.
+    """
+
+    def __init__(self, max_concurrency: int = 32, default_timeout: float = 120.0):
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        self._tool_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._default_timeout = default_timeout
+        self._stats = SchedulerStats()
+
+    async def run(self, tool: BaseTool, tool_call_params: ToolCallParams) -> Message:
+        timeout = tool.timeout or self._default_timeout
+        self._stats.waiting += 1
+        acquired = False
+        try:
+            async with self._tool_semaphore(tool), self._global_semaphore:
+                acquired = True
+                self._stats.waiting -= 1
+                self._stats.running += 1
+                try:
+                    async with asyncio.timeout(timeout):
+                        message = await tool.execute(tool_call_params)
+                finally:
+                    self._stats.running -= 1
+        except TimeoutError:
+            self._stats.timed_out += 1
+            return self._timeout_message(tool, tool_call_params, timeout)
+        except asyncio.CancelledError:
+            self._stats.cancelled += 1
+            raise
+        finally:
+            if not acquired:
+                self._stats.waiting -= 1
+
+        self._stats.completed += 1
+        return message
+
+    def stats(self) -> SchedulerStats:
+        """Return a snapshot of scheduler counters."""
+        return SchedulerStats(**vars(self._stats))
+
+    def _tool_semaphore(self, tool: BaseTool) -> asyncio.Semaphore | contextlib.nullcontext:
+        if tool.max_concurrency is None:
+            return contextlib.nullcontext()
+        semaphore = self._tool_semaphores.get(tool.name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(tool.max_concurrency)
+            self._tool_semaphores[tool.name] = semaphore
+        return semaphore
+
+    @staticmethod
+    def _timeout_message(tool: BaseTool, tool_call_params: ToolCallParams, timeout: float) -> Message:
+        error = (
+            f"ERROR during tool call execution:\n Tool `{tool.name}` did not finish within {timeout:g} seconds and "
+            f"was cancelled. Do not retry it with the same arguments, simplify the request or answer without it."
+        )
+        tool_call_params.stage.append_content(f"\n\r**Timed out after {timeout:g} seconds**\n\r")
+        return Message(
+            role=Role.TOOL,
+            name=StrictStr(tool_call_params.tool_call.function.name),
+            tool_call_id=StrictStr(tool_call_params.tool_call.id),
+            content=StrictStr(error),
+        )
@@ -1,2 +1,3 @@
 TOOL_CALL_HISTORY_KEY = "tool_call_history"
-CUSTOM_CONTENT = "custom_content"
\ No newline at end of file
+CUSTOM_CONTENT = "custom_content"
+STATE_REF_KEY = "tool_call_history_ref"
@@ -0,0 +1,153 @@
+import codecs
+import csv
+import io
+import threading
+
+import pandas as pd
+
+
+class _LineReader:
+    """Iterates decoded lines of CSV bytes and tracks byte offset of the consumed content."""
+
+    def __init__(self, content: bytes, offset: int):
+        self._lines = io.BytesIO(content)
+        self._lines.seek(offset)
+        self.offset = offset
+
+    def __iter__(self) -> '_LineReader':
+        return self
+
+    def __next__(self) -> str:
+        line = self._lines.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode('utf-8', errors='ignore')
+
+
+class CsvPagedTable:
+    """
+    CSV file paginated by rows and rendered as markdown one window at a time.
+
+    On creation, the file is scanned once with a quote-aware reader to build an index of byte offsets where every page
+    starts. Rows are added to the current page while its estimated markdown size (from the widest cell of every
+    column) fits `page_chars`, nothing is rendered. Rendering a page parses only the bytes of its rows; if the rendered
+    page is over the budget (e.g. numbers rendered wider than in the file), its last rows are moved to the next page,
+    and to a new last page for the last one, so `total_pages` may grow as pages are read. A page is larger than
+    `page_chars` only if a single row does not fit.
+    """
+
+    def __init__(self, file_content: bytes, page_chars: int = 10_000):
+        self._content = file_content
+        self._page_chars = page_chars
+        data_offset = len(codecs.BOM_UTF8) if file_content.startswith(codecs.BOM_UTF8) else 0
+        line_reader = _LineReader(file_content, data_offset)
+        reader = csv.reader(line_reader)
+
+        header = next(reader, None)
+        self._columns = self._unique_columns(header) if header else []
+        self._page_offsets = [line_reader.offset]
+        self._lock = threading.Lock()
+        self.total_rows = 0
+
+        page_row_count = 0
+        row_end = line_reader.offset
+        column_widths = self._header_widths()
+        for row in reader:
+            if not row:
+                continue
+            row_widths = [len(cell.strip()) for cell in row]
+            column_widths = self._merge_widths(column_widths, row_widths)
+            page_row_count += 1
+            self.total_rows += 1
+            if page_row_count > 1 and self._estimate_chars(column_widths, page_row_count) > page_chars:
+                # The new row does not fit, close the page before it
+                self._page_offsets.append(row_end)
+                page_row_count = 1
+                column_widths = self._merge_widths(self._header_widths(), row_widths)
+            row_end = line_reader.offset
+
+        # Trailing blank lines belong to the last page
+        self._page_offsets.append(len(file_content))
+        self.total_pages = len(self._page_offsets) - 1 if self._columns else 0
+
+    def page(self, page: int) -> str:
+        """
+        Render rows of the page with the header as markdown table.
+
+        Args:
+            page: 1-based page number, must be within [1, total_pages]
+        """
+        if not self.total_rows:
+            return pd.DataFrame(columns=self._columns).to_markdown(index=False)
+        with self._lock:
+            start, end = self._page_offsets[page - 1], self._page_offsets[page]
+            markdown = self._render(start, end)
+            if len(markdown) <= self._page_chars:
+                return markdown
+
+            row_ends = self._row_ends(start, end)
+            count = len(row_ends)
+            while count > 1 and len(markdown) > self._page_chars:
+                count = max(1, min(count - 1, count * self._page_chars // len(markdown)))
+                markdown = self._render(start, row_ends[count - 1])
+            if count < len(row_ends):
+                # Rows that did not fit start the next page
+                if page == self.total_pages:
+                    self._page_offsets.insert(page, row_ends[count - 1])
+                    self.total_pages += 1
+                else:
+                    self._page_offsets[page] = row_ends[count - 1]
+            return markdown
+
+    def _row_ends(self, start: int, end: int) -> list[int]:
+        """Byte offsets where non-empty rows in `[start, end)` end."""
+        line_reader = _LineReader(self._content, start)
+        row_ends = []
+        for row in csv.reader(line_reader):
+            if row:
+                row_ends.append(line_reader.offset)
+            if line_reader.offset >= end:
+                break
+        return row_ends
+
+    def _header_widths(self) -> list[int]:
+        # tabulate pads header cells with 2 extra characters
+        return [len(column) + 2 for column in self._columns]
+
+    @staticmethod
+    def _merge_widths(column_widths: list[int], row_widths: list[int]) -> list[int]:
+        if len(row_widths) > len(column_widths):
+            column_widths = column_widths + [0] * (len(row_widths) - len(column_widths))
+        return [max(width, row_widths[position]) if position < len(row_widths) else width
+                for position, width in enumerate(column_widths)]
+
+    @staticmethod
+    def _estimate_chars(column_widths: list[int], rows: int) -> int:
+        """Size of a pipe table: header, separator and rows, each line is `| cell | cell |` padded to column widths."""
+        line_chars = sum(column_widths) + 3 * len(column_widths) + 1
+        return (rows + 2) * (line_chars + 1) - 1
+
+    def _render(self, start: int, end: int) -> str:
+        dataframe = pd.read_csv(
+            io.BytesIO(self._content[start:end]),
+            header=None,
+            names=self._columns,
+            encoding='utf-8',
+            encoding_errors='ignore',
+        )
+        return dataframe.to_markdown(index=False)
+
+    @staticmethod
+    def _unique_columns(header: list[str]) -> list[str]:
+        """Deduplicate column names the same way pandas does for a header row (`a`, `a.1`, ...)."""
+        seen: dict[str, int] = {}
+        columns = []
+        for column in header:
+            if column in seen:
+                seen[column] += 1
+                columns.append(f"{column}.{seen[column]}")
+            else:
+                seen[column] = 0
+                columns.append(column)
+        return columns
@@ -1,49 +1,88 @@
+import asyncio
 import io
 from pathlib import Path
+from typing import Iterator
 
-import pdfplumber
 import pandas as pd
-from aidial_client import Dial
-from bs4 import BeautifulSoup
+
+from task.utils.file_content_cache import FileContentCache, CachedFile
+from task.utils.html_text_extractor import HtmlTextExtractor
+from task.utils.pdf_text_extractor import PdfTextExtractor
+
+_DEFAULT_PDF_EXTRACTOR = PdfTextExtractor()
+_DEFAULT_HTML_EXTRACTOR = HtmlTextExtractor()
 
 
 class DialFileContentExtractor:
 
-    def __init__(self, endpoint: str, api_key: str):
-        #TODO:
-        # Set Dial client with endpoint as base_url and api_key
-        raise NotImplementedError()
+    def __init__(
+            self,
+            api_key: str,
+            content_cache: FileContentCache,
+            pdf_extractor: PdfTextExtractor | None = None,
+            html_extractor: HtmlTextExtractor | None = None,
+    ):
+        self.api_key = api_key
+        self.content_cache = content_cache
+        self.pdf_extractor = pdf_extractor or _DEFAULT_PDF_EXTRACTOR
+        self.html_extractor = html_extractor or _DEFAULT_HTML_EXTRACTOR
+
+    async def fetch(self, file_url: str) -> CachedFile:
+        """Download file from DIAL bucket or take it from the shared cache."""
+        return await self.content_cache.fetch(file_url, self.api_key)
+
+    async def download(self, file_url: str) -> tuple[str, bytes]:
+        """Download file from DIAL bucket (or take it from the shared cache) and return its name and raw content."""
+        cached_file = await self.fetch(file_url)
+        file_content = await asyncio.to_thread(cached_file.read)
+        return cached_file.filename, file_content
+
+    async def extract_text(self, file_url: str) -> str:
+        filename, file_content = await self.download(file_url)
+        return await asyncio.to_thread(self.extract_text_from_content, file_content, filename)
+
+    def extract_text_from_content(self, file_content: bytes, filename: str) -> str:
+        """Extract text from already downloaded file content."""
+        file_extension = Path(filename).suffix.lower()
+        return self.__extract_text(file_content, file_extension, filename)
 
-    def extract_text(self, file_url: str) -> str:
-        #TODO:
-        # 1. Download with Dial client file by `file_url` (files -> download)
-        # 2. Get downloaded file name and content
-        # 3. Get file extension, use for this `Path(filename).suffix.lower()`
-        # 4. Call `__extract_text` and return its result
-        raise NotImplementedError()
+    def iter_text_from_content(self, file_content: bytes, filename: str) -> Iterator[str]:
+        """
+        Lazily extract text from already downloaded file content. PDF is yielded page by page, so consumers can
+        process the first pages while the rest are still being parsed, other types are yielded as a whole.
+        Extraction errors are raised, so a partially extracted document is never taken for a complete one.
+        """
+        file_extension = Path(filename).suffix.lower()
+        if file_extension != '.pdf':
+            yield self.__extract_text(file_content, file_extension, filename)
+            return
+
+        try:
+            yield from self.pdf_extractor.iter_pages(file_content)
+        except Exception as e:
+            print(f"[DialFileContentExtractor] Error extracting text from {filename}: {e}")
+            raise
 
     def __extract_text(self, file_content: bytes, file_extension: str, filename: str) -> str:
         """Extract text content based on file type."""
-        #TODO:
-        # Wrap in `try-except` block:
-        # try:
-        #   1. if `file_extension` is '.txt' then return `file_content.decode('utf-8', errors='ignore')`
-        #   2. if `file_extension` is '.pdf' then:
-        #       - load it with `io.BytesIO(file_content)`
-        #       - with pdfplumber.open PDF files bites
-        #       - iterate through created pages adn create array with extracted page text
-        #       - return it joined with `\n`
-        #   3. if `file_extension` is '.csv' then:
-        #       - decode `file_content` with encoding 'utf-8' and errors='ignore'
-        #       - create csv buffer from `io.StringIO(decoded_text_content)`
-        #       - read csv with pandas (pd) as dataframe
-        #       - return dataframe to markdown (index=False)
-        #   4. if `file_extension` is in ['.html', '.htm'] then:
-        #       - decode `file_content` with encoding 'utf-8' and errors='ignore'
-        #       - create BeautifulSoup with decoded html content, features set as 'html.parser' as `soup`
-        #       - remove script and style elements: iterate through `soup(["script", "style"])` and `decompose` those scripts
-        #       - return `soup.get_text(separator='\n', strip=True)`
-        #   5. otherwise return it as decoded `file_content` with encoding 'utf-8' and errors='ignore'
-        # except:
-        #   print an error and return empty string
-        raise NotImplementedError()
+        try:
+            if file_extension == '.txt':
+                return file_content.decode('utf-8', errors='ignore')
+
+            if file_extension == '.pdf':
+                return '\n'.join(self.pdf_extractor.extract_pages(file_content))
+
+            if file_extension == '.csv':
+                decoded_text_content = file_content.decode('utf-8', errors='ignore')
+                csv_buffer = io.StringIO(decoded_text_content)
+                dataframe = pd.read_csv(csv_buffer)
+                return dataframe.to_markdown(index=False)
+
+            if file_extension in ['.html', '.htm']:
+                decoded_html_content = file_content.decode('utf-8', errors='ignore')
+                return self.html_extractor.extract(decoded_html_content)
+
+            return file_content.decode('utf-8', errors='ignore')
+        except Exception as e:
+            print(f"[DialFileContentExtractor] Error extracting text from {filename}: {e}")
+            raise
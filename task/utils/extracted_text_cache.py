@@ -0,0 +1,135 @@
+import mmap
+import tempfile
+import threading
+from collections import OrderedDict
+
+from task.utils.csv_paged_table import CsvPagedTable
+
+
+class PagedText:
+    """
+    Extracted text split into fixed-size character pages.
+
+    Small texts are kept in memory. Texts longer than `spill_threshold` characters are written as UTF-8 to a temporary
+    file that is memory-mapped, with byte offsets of every page boundary, so a page request costs only a slice.
+    """
+
+    def __init__(self, text: str, page_size: int, spill_threshold: int):
+        self.length = len(text)
+        self.page_size = page_size
+        self.total_pages = (self.length + page_size - 1) // page_size
+        self._text: str | None = None
+        self._mmap: mmap.mmap | None = None
+        self._file = None
+        self._offsets: list[int] = []
+
+        if self.length <= spill_threshold:
+            self._text = text
+            return
+
+        self._file = tempfile.TemporaryFile()
+        offset = 0
+        self._offsets.append(offset)
+        for start in range(0, self.length, page_size):
+            encoded_page = text[start:start + page_size].encode('utf-8', errors='surrogatepass')
+            self._file.write(encoded_page)
+            offset += len(encoded_page)
+            self._offsets.append(offset)
+        self._file.flush()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def spilled(self) -> bool:
+        return self._mmap is not None
+
+    def text(self) -> str:
+        """Return the whole text."""
+        if self._text is not None:
+            return self._text
+        return self._mmap[:].decode('utf-8', errors='surrogatepass')
+
+    def page(self, page: int) -> str:
+        """
+        Return page content.
+
+        Args:
+            page: 1-based page number, must be within [1, total_pages]
+        """
+        if self._text is not None:
+            start_index = (page - 1) * self.page_size
+            return self._text[start_index:start_index + self.page_size]
+        return self._mmap[self._offsets[page - 1]:self._offsets[page]].decode('utf-8', errors='surrogatepass')
+
+
+PagedDocument = PagedText | CsvPagedTable
+
+
+class ExtractedTextCache:
+    """
+    Thread-safe LRU cache of extracted file texts with their page index.
+    Paginated reading of a document extracts it once, further pages are served from the cache.
+    """
+
+    def __init__(self, max_entries: int = 16, page_size: int = 10_000, spill_threshold: int = 1_000_000):
+        self._cache: OrderedDict[str, PagedDocument] = OrderedDict()
+        self._max_entries = max_entries
+        self._page_size = page_size
+        self._spill_threshold = spill_threshold
+        self._lock = threading.Lock()
+
+    @property
+    def page_size(self) -> int:
+        return self._page_size
+
+    def get(self, key: str) -> PagedDocument | None:
+        """
+        Retrieve cached text and mark it as most recently used.
+
+        Args:
+            key: Cache key, must identify file content (e.g. file URL with ETag)
+
+        Returns:
+            Paged document if found, None otherwise
+        """
+        with self._lock:
+            paged_text = self._cache.get(key)
+            if paged_text is not None:
+                self._cache.move_to_end(key)
+            return paged_text
+
+    def set(self, key: str, text: str) -> PagedText:
+        """
+        Build page index for text and store it.
+
+        Args:
+            key: Cache key
+            text: Extracted text
+
+        Returns:
+            Paged text
+        """
+        return self.put(key, PagedText(text, self._page_size, self._spill_threshold))
+
+    def put(self, key: str, document: PagedDocument) -> PagedDocument:
+        """
+        Store already paginated document (e.g. CSV table paginated by rows).
+
+        Args:
+            key: Cache key
+            document: Paged document
+
+        Returns:
+            Stored document
+        """
+        with self._lock:
+            self._cache[key] = document
+            self._cache.move_to_end(key)
+            # Evicted texts are not closed explicitly, readers may still hold them. Files are released on GC.
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return document
+
+    def clear(self) -> None:
+        """Clear all cached texts."""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+import httpx
+
+
+@dataclass
+class FileCacheStats:
+    hits: int = 0
+    revalidations: int = 0
+    downloads: int = 0
+    evictions: int = 0
+    entries: int = 0
+    resident_bytes: int = 0
+
+
+@dataclass
+class CachedFile:
+    """Downloaded file spooled to memory (small files) or to a temporary file on disk (large files)."""
+    filename: str
+    etag: Optional[str]
+    size: int
+    fetched_at: float
+    api_key_hash: str
+    _file: tempfile.SpooledTemporaryFile
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def read(self) -> bytes:
+        """Return the whole file content. Safe to call concurrently."""
+        with self._lock:
+            self._file.seek(0)
+            return self._file.read()
+
+
+class FileContentCache:
+    """
+    Async streaming downloader of DIAL files with a small shared cache.
+
+    Files are streamed to spooled temporary files instead of being buffered whole in memory. Entries are keyed by file
+    URL and validated with ETag: within `fresh_seconds` a file requested again with the same API key (e.g. by
+    FileContentExtractionTool and RagTool in the same turn) is served without any request, afterwards it is
+    revalidated with `If-None-Match` and downloaded again only if it changed. Concurrent requests for the same file
+    share one download. Downloads go through `http_client` (e.g. the shared `HttpClientPool.client`) when given,
+    otherwise through an own client.
+    """
+
+    def __init__(
+            self,
+            endpoint: str,
+            max_entries: int = 32,
+            max_bytes: int = 256 * 1024 * 1024,
+            fresh_seconds: float = 60,
+            spool_max_size: int = 8 * 1024 * 1024,
+            http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        self._endpoint = endpoint.rstrip('/')
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._fresh_seconds = fresh_seconds
+        self._spool_max_size = spool_max_size
+        self._owns_client = http_client is None
+        self._client = http_client or httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        self._entries: OrderedDict[str, CachedFile] = OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Task] = {}
+        self._resident_bytes = 0
+        self._stats = FileCacheStats()
+
+    async def fetch(self, file_url: str, api_key: str) -> CachedFile:
+        """
+        Get file from cache or download it.
+
+        Args:
+            file_url: DIAL file URL (e.g. `files/{bucket}/{path}`)
+            api_key: API key of the current request
+
+        Returns:
+            Cached file
+        """
+        api_key_hash = hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+        entry = self._entries.get(file_url)
+        if entry and entry.api_key_hash == api_key_hash and time.monotonic() - entry.fetched_at < self._fresh_seconds:
+            self._entries.move_to_end(file_url)
+            self._stats.hits += 1
+            return entry
+
+        in_flight_key = (file_url, api_key_hash)
+        task = self._in_flight.get(in_flight_key)
+        if task is None:
+            task = asyncio.create_task(self._download(file_url, api_key, api_key_hash))
+            self._in_flight[in_flight_key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(in_flight_key, None))
+        # Shield the shared download, cancellation of one waiter must not break the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> FileCacheStats:
+        """Return a snapshot of cache counters."""
+        return FileCacheStats(
+            hits=self._stats.hits,
+            revalidations=self._stats.revalidations,
+            downloads=self._stats.downloads,
+            evictions=self._stats.evictions,
+            entries=len(self._entries),
+            resident_bytes=self._resident_bytes,
+        )
+
+    async def close(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def _download(self, file_url: str, api_key: str, api_key_hash: str) -> CachedFile:
+        entry = self._entries.get(file_url)
+        headers = {"Api-Key": api_key}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        async with self._client.stream("GET", self._url(file_url), headers=headers) as response:
+            if response.status_code == httpx.codes.NOT_MODIFIED and entry:
+                entry.fetched_at = time.monotonic()
+                entry.api_key_hash = api_key_hash
+                self._entries.move_to_end(file_url)
+                self._stats.revalidations += 1
+                return entry
+
+            response.raise_for_status()
+            spooled_file = tempfile.SpooledTemporaryFile(max_size=self._spool_max_size)
+            size = 0
+            async for data in response.aiter_bytes():
+                spooled_file.write(data)
+                size += len(data)
+
+            cached_file = CachedFile(
+                filename=self._filename(file_url),
+                etag=response.headers.get("ETag"),
+                size=size,
+                fetched_at=time.monotonic(),
+                api_key_hash=api_key_hash,
+                _file=spooled_file,
+            )
+
+        self._stats.downloads += 1
+        self._store(file_url, cached_file)
+        return cached_file
+
+    def _store(self, file_url: str, cached_file: CachedFile) -> None:
+        if previous := self._entries.pop(file_url, None):
+            self._resident_bytes -= previous.size
+
+        if cached_file.size > self._max_bytes:
+            return
+
+        self._entries[file_url] = cached_file
+        self._resident_bytes += cached_file.size
+        # Evicted files are not closed explicitly, readers may still hold them. Spooled files are released on GC.
+        while len(self._entries) > self._max_entries or self._resident_bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._resident_bytes -= evicted.size
+            self._stats.evictions += 1
+
+    def _url(self, file_url: str) -> str:
+        if urlparse(file_url).scheme:
+            return file_url
+        return f"{self._endpoint}/v1/{file_url.lstrip('/')}"
+
+    @staticmethod
+    def _filename(file_url: str) -> str:
+        return unquote(PurePosixPath(urlparse(file_url).path).name)
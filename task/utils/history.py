@@ -1,12 +1,25 @@
-import copy
 from typing import Any
 
 from aidial_sdk.chat_completion import Message, Role
 
-from task.utils.constants import TOOL_CALL_HISTORY_KEY, CUSTOM_CONTENT
+from task.utils.constants import TOOL_CALL_HISTORY_KEY, CUSTOM_CONTENT, STATE_REF_KEY
 
+_ATTACHMENTS_HEADER = '\n\nAttached files URLs:\n'
 
-def unpack_messages(messages: list[Message], state_history: list[dict[str, Any]]) -> list[dict[str, Any]]:
+
+def unpack_messages(
+        messages: list[Message],
+        state_history: list[dict[str, Any]],
+        stored_histories: dict[str, list[dict[str, Any]]] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Build model messages from the request messages and the tool call history of the current request.
+
+    Tool call history saved in the state of every assistant message is put before that message. The history is either
+    inline or referenced by `STATE_REF_KEY` and taken from `stored_histories` (see `ConversationStateRepository`).
+    Messages from the state are not copied. Custom content of messages in `state_history` is removed in place, so it
+    is not sent to the model and not persisted in the state of the response.
+    """
     result: list[dict[str, Any]] = []
     for message in messages:
         if message.role == Role.ASSISTANT:
@@ -15,6 +28,8 @@ def unpack_messages(messages: list[Message], state_history: list[dict[str, Any]]
                 state = custom_content.state
                 if state and isinstance(state, dict):
                     tool_call_history = state.get(TOOL_CALL_HISTORY_KEY)
+                    if tool_call_history is None and stored_histories and isinstance(state.get(STATE_REF_KEY), str):
+                        tool_call_history = stored_histories.get(state[STATE_REF_KEY])
                     if tool_call_history and isinstance(tool_call_history, list):
                         for history_msg in tool_call_history:
                             if history_msg.get("role") == Role.TOOL.value:
@@ -28,22 +43,16 @@ def unpack_messages(messages: list[Message], state_history: list[dict[str, Any]]
                             else:
                                 result.append(history_msg)
 
-                    msg = copy.deepcopy(message)
-                    msg.custom_content = None
-                    result.append(msg.dict(exclude_none=True))
+                    result.append(message.dict(exclude_none=True, exclude={CUSTOM_CONTENT}))
         else:
-            attachments_urls_content = ''
-            if message.custom_content and message.custom_content.attachments:
-                attachments_urls_content = '\n\nAttached files URLs:\n'
-                for attachment in message.custom_content.attachments:
-                    if attachment.url:
-                        attachments_urls_content += f"{attachment.url}\n"
-                    elif attachment.reference_url:
-                        attachments_urls_content += f"{attachment.reference_url}\n"
-
             content = message.content or ''
-            if attachments_urls_content:
-                content += attachments_urls_content
+            if message.custom_content and message.custom_content.attachments:
+                urls = [
+                    f"{attachment.url or attachment.reference_url}\n"
+                    for attachment in message.custom_content.attachments
+                    if attachment.url or attachment.reference_url
+                ]
+                content = f"{content}{_ATTACHMENTS_HEADER}{''.join(urls)}"
 
             result.append(
                 {
@@ -0,0 +1,125 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from aidial_sdk.chat_completion import Role
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Approximate per-message overhead of the chat format (role, separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def default_token_counter() -> Callable[[str], int]:
+    """Return tiktoken `o200k_base` counter if tiktoken is installed, otherwise ~4 characters per token estimate."""
+    if tiktoken is not None:
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    return lambda text: (len(text) + 3) // 4
+
+
+@dataclass
+class CompactionResult:
+    messages: list[dict[str, Any]]
+    tokens_before: int
+    tokens_after: int
+    compacted_messages: int
+
+
+class HistoryCompactor:
+    """
+    Keeps prompt under `max_tokens` by compacting results of tool calls from older turns.
+
+    A turn starts with a user message. The system prompt and the last `keep_recent_turns` turns (including tool calls of
+    the current request) are never changed. If the prompt is over budget, tool results of older turns are replaced,
+    oldest first, with stubs holding the first `stub_chars` characters; if it is still over budget, with short notes
+    only. A stub depends only on the original result, so an old tool result is compacted to the same text on every
+    turn. Input messages are not modified.
+    """
+
+    def __init__(
+            self,
+            max_tokens: int = 60_000,
+            keep_recent_turns: int = 2,
+            stub_chars: int = 500,
+            token_counter: Callable[[str], int] | None = None,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.stub_chars = stub_chars
+        self._count_tokens = token_counter or default_token_counter()
+
+    def compact(self, messages: list[dict[str, Any]]) -> CompactionResult:
+        message_tokens = [self._message_tokens(msg) for msg in messages]
+        tokens_before = sum(message_tokens)
+        total = tokens_before
+        if total <= self.max_tokens:
+            return CompactionResult(messages, tokens_before, total, 0)
+
+        candidates = [
+            position for position in range(self._recent_turns_start(messages))
+            if messages[position].get("role") == Role.TOOL.value and isinstance(messages[position].get("content"), str)
+        ]
+        result = list(messages)
+        compacted = set()
+        # First pass keeps the beginning of every old result, second one leaves only notes
+        for note_only in (False, True):
+            for position in candidates:
+                if total <= self.max_tokens:
+                    break
+                compacted_msg = self._compact_message(messages[position], note_only)
+                if compacted_msg is None:
+                    continue
+                tokens = self._message_tokens(compacted_msg)
+                if tokens >= message_tokens[position]:
+                    continue
+                total -= message_tokens[position] - tokens
+                message_tokens[position] = tokens
+                result[position] = compacted_msg
+                compacted.add(position)
+
+        return CompactionResult(result, tokens_before, total, len(compacted))
+
+    def _recent_turns_start(self, messages: list[dict[str, Any]]) -> int:
+        """Position of the first message of the recent turns, which are kept as is."""
+        user_positions = [
+            position for position, msg in enumerate(messages) if msg.get("role") == Role.USER.value
+        ]
+        if self.keep_recent_turns <= 0:
+            return len(messages)
+        if len(user_positions) < self.keep_recent_turns:
+            return 0
+        return user_positions[-self.keep_recent_turns]
+
+    def _compact_message(self, msg: dict[str, Any], note_only: bool) -> dict[str, Any] | None:
+        content = msg["content"]
+        if not note_only and len(content) <= self.stub_chars:
+            return None
+
+        return {**msg, "content": self._make_stub(content, note_only)}
+
+    def _make_stub(self, content: str, note_only: bool) -> str:
+        if note_only:
+            return (
+                f"[Result of an earlier tool call ({len(content)} characters) was omitted to save context. "
+                f"Call the tool again if it is needed.]"
+            )
+        return (
+            f"{content[:self.stub_chars]}\n"
+            f"[... {len(content) - self.stub_chars} more characters of an earlier tool result were omitted to save "
+            f"context. Call the tool again if the full result is needed.]"
+        )
+
+    def _message_tokens(self, msg: dict[str, Any]) -> int:
+        tokens = _MESSAGE_OVERHEAD_TOKENS
+        content = msg.get("content")
+        if isinstance(content, str):
+            tokens += self._count_tokens(content)
+        elif content:
+            tokens += self._count_tokens(json.dumps(content, default=str))
+        if tool_calls := msg.get("tool_calls"):
+            tokens += self._count_tokens(json.dumps(tool_calls, default=str))
+        return tokens
@@ -0,0 +1,154 @@
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+
+try:
+    # `selectolax.parser` (Modest engine) is removed in selectolax 1.0, Lexbor is available since 0.3
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+SELECTOLAX_BACKEND = "selectolax"
+LXML_BACKEND = "lxml"
+HTML_PARSER_BACKEND = "html.parser"
+
+# Textarea content is raw text in HTML but parsed as markup by `html.parser`, form field values are not document text
+_REMOVED_TAGS = ["script", "style", "textarea"]
+# CDATA sections are bogus comments in HTML content but text for `html.parser`, they are removed before parsing
+_CDATA_PATTERN = re.compile(r'<!\[CDATA\[.*?\]\]>', re.DOTALL)
+
+# Typical web pages and exported documents. A backend is selected automatically only if its output on every document
+# equals the `html.parser` output.
+_PARITY_CORPUS = (
+    "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>Microwave user guide</title>"
+    "<style>body {font-family: sans-serif}</style><script>window.dataLayer = [];</script></head><body>"
+    "<nav><ul><li><a href=\"/\">Home</a></li><li><a href=\"/manuals\">Manuals</a></li></ul></nav>"
+    "<article><h1>Getting started</h1><p>Place the oven on a <b>flat</b>, stable surface. Keep at least "
+    "<em>10&nbsp;cm</em> of space around it.</p><h2>Cooking times</h2><table><thead><tr><th>Food</th>"
+    "<th>Power</th><th>Time</th></tr></thead><tbody><tr><td>Popcorn</td><td>900 W</td><td>2&ndash;3 min</td></tr>"
+    "<tr><td>Rice</td><td>600 W</td><td>12 min</td></tr></tbody></table><!-- legacy table end -->"
+    "<ol><li>Open the door.<li>Insert food.<li>Press <kbd>Start</kbd>.</ol></article>"
+    "<footer><p>&copy; 2024 Example Corp &middot; <a href=\"/privacy\">Privacy</a></p></footer></body></html>",
+    "<html><body><div class=\"post\"><h2>Release notes</h2><p>Version 2.1 fixes <code>timeout</code> handling."
+    "<p>Known issues:<ul><li>Slow start on &lt;1 GB RAM<li>Logs are &quot;verbose&quot;</ul>"
+    "<pre>  $ app --check\n  OK</pre><p>See <a href=\"#faq\">FAQ</a> &amp; docs.</div></body></html>",
+    "<form action=\"/feedback\"><label>Your feedback</label><textarea name=\"text\">Type <b>here</b></textarea>"
+    "<select><option>Good</option><option selected>Bad</option></select><button>Send</button></form>"
+    "<p>Data: <![CDATA[x < y]]> end</p><noscript>Enable JavaScript</noscript>",
+    "<div>Unclosed <span>span<p>paragraph<br>line break<p>next paragraph</div><p>Bad <b><i>nesting</b></i> tail",
+    "<template><p>template content</p></template><p>visible</p><svg><title>chart</title><text>42%</text></svg>",
+    "plain text without tags",
+    "",
+)
+
+
+@dataclass
+class HtmlBenchmarkResult:
+    backend: str
+    avg_ms: float
+    mb_per_second: float
+
+
+def installed_backends() -> list[str]:
+    """Return installed HTML-to-text backends, fastest first."""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append(SELECTOLAX_BACKEND)
+    if lxml is not None:
+        backends.append(LXML_BACKEND)
+    backends.append(HTML_PARSER_BACKEND)
+    return backends
+
+
+@lru_cache(maxsize=None)
+def matches_reference(backend: str) -> bool:
+    """Check that the backend extracts the same text as `html.parser` from every document of the parity corpus."""
+    extractor = HtmlTextExtractor(backend=backend)
+    reference = HtmlTextExtractor(backend=HTML_PARSER_BACKEND)
+    for html in _PARITY_CORPUS:
+        if extractor.extract(html) != reference.extract(html):
+            print(f"[HtmlTextExtractor] Backend {backend} output differs from {HTML_PARSER_BACKEND}, it is not used")
+            return False
+    return True
+
+
+def available_backends() -> list[str]:
+    """Return installed backends with the same output as `html.parser` (see `matches_reference`), fastest first."""
+    return [backend for backend in installed_backends() if matches_reference(backend)]
+
+
+class HtmlTextExtractor:
+    """
+    Converts HTML to text: script, style and textarea elements and CDATA sections are dropped, remaining text nodes are
+    stripped and joined with new lines (the same output as `BeautifulSoup.get_text(separator='\\n', strip=True)`).
+
+    Unless `backend` is given, the fastest installed backend whose output matches `html.parser` on the parity corpus is
+    used: selectolax (Lexbor), BeautifulSoup with lxml, or BeautifulSoup with the built-in `html.parser`. An explicitly
+    given backend is used as is. Input longer than `max_input_chars` is truncated before parsing.
+    """
+
+    def __init__(self, backend: str | None = None, max_input_chars: int = 5_000_000):
+        self.backend = backend or available_backends()[0]
+        self.max_input_chars = max_input_chars
+
+    def extract(self, html: str) -> str:
+        if len(html) > self.max_input_chars:
+            html = html[:self.max_input_chars]
+
+        html = _CDATA_PATTERN.sub('', html)
+        if self.backend == SELECTOLAX_BACKEND:
+            return self._extract_with_selectolax(html)
+        return self._extract_with_soup(html, self.backend)
+
+    @staticmethod
+    def _extract_with_soup(html: str, features: str) -> str:
+        soup = BeautifulSoup(html, features=features)
+        for script in soup(_REMOVED_TAGS):
+            script.decompose()
+        return soup.get_text(separator='\n', strip=True)
+
+    @staticmethod
+    def _extract_with_selectolax(html: str) -> str:
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(_REMOVED_TAGS)
+        if tree.root is None:
+            return ''
+
+        texts = []
+        for node in tree.root.traverse(include_text=True):
+            if node.tag == '-text':
+                text = node.text(deep=False).strip()
+                if text:
+                    texts.append(text)
+        return '\n'.join(texts)
+
+
+def benchmark_backends(html: str, repeat: int = 5) -> list[HtmlBenchmarkResult]:
+    """
+    Measure throughput of every installed backend on the same document, including ones not selected automatically.
+
+    Args:
+        html: HTML document
+        repeat: Number of runs per backend
+
+    Returns:
+        Average time per document and throughput for each backend
+    """
+    size_mb = len(html.encode('utf-8')) / (1024 * 1024)
+    results = []
+    for backend in installed_backends():
+        extractor = HtmlTextExtractor(backend=backend, max_input_chars=len(html))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            extractor.extract(html)
+        avg_seconds = (time.perf_counter() - start) / repeat
+        results.append(HtmlBenchmarkResult(backend, avg_seconds * 1000, size_mb / avg_seconds if avg_seconds else 0.0))
+    return results
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from aidial_client import AsyncDial, AsyncDialClientPool
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+@dataclass
+class HttpPoolStats:
+    requests: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+    http2: bool = False
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused_connections / self.requests if self.requests else 0.0
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that counts requests and whether each one had to open a new connection."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+        self.stats = HttpPoolStats()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        opened = False
+        parent_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            nonlocal opened
+            if event_name.startswith("connection.connect_") and event_name.endswith(".started"):
+                opened = True
+            if parent_trace:
+                await parent_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        response = await self._transport.handle_async_request(request)
+
+        self.stats.requests += 1
+        if opened:
+            self.stats.new_connections += 1
+        else:
+            self.stats.reused_connections += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class HttpClientPool:
+    """
+    Process-wide pool of HTTP connections to DIAL.
+
+    One connection pool with keep-alive (and HTTP/2 when `h2` is installed) is shared by all DIAL calls: the
+    orchestration model, deployment tools, RAG generation, file downloads and uploads. `dial` creates a lightweight
+    `AsyncDial` per request with the public `AsyncDialClientPool` API: it carries the per-request API key but sends
+    requests through the shared connections. `client` is a plain `httpx.AsyncClient` over the same connections.
+    """
+
+    def __init__(
+            self,
+            endpoint: str,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            http2: bool = True,
+            timeout: httpx.Timeout = httpx.Timeout(600.0, connect=5.0),
+    ):
+        self.endpoint = endpoint
+        self.http2 = http2 and h2 is not None
+        self._timeout = timeout
+        self._transport = _CountingTransport(
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                http2=self.http2,
+            )
+        )
+        # Both clients send requests through the same transport, so they share its connections
+        self.client = httpx.AsyncClient(transport=self._transport, timeout=timeout)
+        self._dial_pool = AsyncDialClientPool(transport=self._transport, timeout=timeout)
+
+    def dial(self, api_key: str) -> AsyncDial:
+        """
+        Create `AsyncDial` client authorized with `api_key` on top of the shared connections. Pooled clients have no
+        default API version, pass `api_version` to `chat.completions.create`.
+        """
+        return self._dial_pool.create_client(base_url=self.endpoint, api_key=api_key, timeout=self._timeout)
+
+    def stats(self) -> HttpPoolStats:
+        """Return a snapshot of request and connection counters."""
+        stats = self._transport.stats
+        return HttpPoolStats(
+            requests=stats.requests,
+            new_connections=stats.new_connections,
+            reused_connections=stats.reused_connections,
+            http2=self.http2,
+        )
+
+    async def close(self) -> None:
+        await self.client.aclose()
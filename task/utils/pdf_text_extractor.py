@@ -0,0 +1,176 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import pdfplumber
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+PDFPLUMBER_BACKEND = "pdfplumber"
+PDFIUM_BACKEND = "pdfium"
+
+
+@dataclass
+class PdfBenchmarkResult:
+    workers: int
+    avg_ms: float
+    pages_per_second: float
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    # The app process is multi-threaded (event loop executors, HTTP clients, FAISS/OpenMP), a forked worker may inherit
+    # a lock held by another thread and deadlock, so workers are started from a clean process
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(start_method)
+
+
+def _iter_pdfplumber_pages(source: bytes | str, start: int, end: int) -> Iterator[str]:
+    pdf_file = io.BytesIO(source) if isinstance(source, bytes) else source
+    with pdfplumber.open(pdf_file, pages=list(range(start + 1, end + 1))) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ''
+            # Parsed page objects are not needed anymore, release them to keep peak memory flat
+            page.flush_cache()
+
+
+def _iter_pdfium_pages(source: bytes | str, start: int, end: int) -> Iterator[str]:
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for page_number in range(start, end):
+            page = pdf[page_number]
+            text_page = page.get_textpage()
+            try:
+                yield text_page.get_text_range().replace('\r\n', '\n')
+            finally:
+                text_page.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _iter_pages(source: bytes | str, start: int, end: int, backend: str) -> Iterator[str]:
+    """Yield text of pages [start, end) of PDF given as bytes or as a file path."""
+    if backend == PDFIUM_BACKEND:
+        try:
+            # Materialize range, so that a failure in the fast backend does not leave partially yielded pages
+            pages = list(_iter_pdfium_pages(source, start, end))
+        except Exception as e:
+            print(f"[PdfTextExtractor] pdfium failed on pages {start}-{end}, falling back to pdfplumber: {e}")
+        else:
+            yield from pages
+            return
+    yield from _iter_pdfplumber_pages(source, start, end)
+
+
+def _extract_pages(pdf_path: str, start: int, end: int, backend: str) -> list[str]:
+    """Extract text of pages [start, end). Module level function, so it can be sent to worker processes."""
+    return list(_iter_pages(pdf_path, start, end, backend))
+
+
+class PdfTextExtractor:
+    """
+    Extracts PDF text page by page.
+
+    With `workers` > 0 large PDFs are split into ranges of `pages_per_task` pages that are extracted in parallel by a
+    process pool (started with `forkserver`/`spawn`, never forked), page order is preserved. The PDF is written once to
+    a temporary file and workers open it by path, so the bytes are not pickled into every task. With `fast_backend`
+    the lighter pdfium text backend is used when `pypdfium2` is installed, pdfplumber stays as the fallback.
+    """
+
+    def __init__(self, workers: int = 0, pages_per_task: int = 16, fast_backend: bool = False):
+        self._pages_per_task = pages_per_task
+        self._backend = PDFIUM_BACKEND if fast_backend and pdfium is not None else PDFPLUMBER_BACKEND
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context())
+
+    def extract_pages(self, file_content: bytes) -> list[str]:
+        """Return text of every page."""
+        return list(self.iter_pages(file_content))
+
+    def iter_pages(self, file_content: bytes) -> Iterator[str]:
+        """Lazily yield text of every page in document order."""
+        page_count = self._page_count(file_content)
+        if self._executor is None or page_count <= self._pages_per_task:
+            yield from _iter_pages(file_content, 0, page_count, self._backend)
+            return
+
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_file:
+            pdf_file.write(file_content)
+        futures = []
+        try:
+            futures = [
+                self._executor.submit(
+                    _extract_pages, pdf_file.name, start, min(start + self._pages_per_task, page_count), self._backend
+                )
+                for start in range(0, page_count, self._pages_per_task)
+            ]
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            # Workers that are still running keep their open file, the path is not needed anymore
+            os.unlink(pdf_file.name)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _page_count(self, file_content: bytes) -> int:
+        if self._backend == PDFIUM_BACKEND:
+            try:
+                pdf = pdfium.PdfDocument(file_content)
+                try:
+                    return len(pdf)
+                finally:
+                    pdf.close()
+            except Exception:
+                pass
+        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+            return len(pdf.pages)
+
+
+def benchmark_extraction(
+        file_content: bytes,
+        workers: tuple[int, ...] = (0, 2, 4),
+        repeat: int = 3,
+        pages_per_task: int = 16,
+        fast_backend: bool = False,
+) -> list[PdfBenchmarkResult]:
+    """
+    Measure sequential (0 workers) and parallel extraction of the same PDF.
+
+    Args:
+        file_content: PDF bytes
+        workers: Process pool sizes to compare
+        repeat: Number of runs per pool size, after one warm-up run that starts the worker processes
+        pages_per_task: Pages extracted by one worker task
+        fast_backend: Use pdfium backend if installed
+
+    Returns:
+        Average time per document and throughput for each pool size
+    """
+    results = []
+    for worker_count in workers:
+        extractor = PdfTextExtractor(workers=worker_count, pages_per_task=pages_per_task, fast_backend=fast_backend)
+        try:
+            page_count = len(extractor.extract_pages(file_content))
+            start = time.perf_counter()
+            for _ in range(repeat):
+                extractor.extract_pages(file_content)
+            avg_seconds = (time.perf_counter() - start) / repeat
+        finally:
+            extractor.shutdown()
+        results.append(
+            PdfBenchmarkResult(worker_count, avg_seconds * 1000, page_count / avg_seconds if avg_seconds else 0.0)
+        )
+    return results
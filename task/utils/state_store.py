@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Protocol
+
+from task.utils.constants import TOOL_CALL_HISTORY_KEY, STATE_REF_KEY
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+MEMORY_STATE_STORE = "memory"
+FILE_STATE_STORE = "file"
+REDIS_STATE_STORE = "redis"
+INLINE_STATE = "inline"
+
+
+class StateStore(Protocol):
+    """
+    Key-value store of conversation state, a subset of the `redis.asyncio.Redis` interface: a Redis client can be used
+    as is, local stores implement the same methods.
+    """
+
+    async def get(self, name: str) -> Optional[str | bytes]:
+        ...
+
+    async def set(self, name: str, value: str, ex: Optional[int] = None) -> Any:
+        ...
+
+    async def delete(self, *names: str) -> int:
+        ...
+
+
+class InMemoryStateStore:
+    """Process-local LRU store, entries are lost on restart."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self._entries: OrderedDict[str, tuple[str, Optional[float]]] = OrderedDict()
+        self._max_entries = max_entries
+
+    async def get(self, name: str) -> Optional[str]:
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[name]
+            return None
+        self._entries.move_to_end(name)
+        return value
+
+    async def set(self, name: str, value: str, ex: Optional[int] = None) -> bool:
+        self._entries[name] = (value, time.monotonic() + ex if ex else None)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(self._entries.pop(name, None) is not None for name in names)
+
+
+class FileStateStore:
+    """
+    Local-disk store, one file per key under `root_dir`. Writes are atomic (temporary file + rename), file IO runs in
+    a thread. Every file starts with its expiration time: an expired entry is deleted when it is read, and the whole
+    directory is swept for expired entries on `set` at most once per `sweep_interval` seconds, so entries that are
+    never read again do not accumulate.
+    """
+
+    def __init__(self, root_dir: str, sweep_interval: float = 600.0):
+        self._root = Path(root_dir)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    async def get(self, name: str) -> Optional[str]:
+        return await asyncio.to_thread(self._read, self._path(name))
+
+    async def set(self, name: str, value: str, ex: Optional[int] = None) -> bool:
+        await asyncio.to_thread(self._write, self._path(name), value, ex)
+        self._schedule_sweep()
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum([await asyncio.to_thread(self._remove, self._path(name)) for name in names])
+
+    async def sweep(self) -> int:
+        """Delete all expired entries, returns number of deleted entries."""
+        return await asyncio.to_thread(self._sweep)
+
+    def _schedule_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep < self._sweep_interval:
+            return
+        if self._sweep_task is not None and not self._sweep_task.done():
+            return
+        self._last_sweep = time.monotonic()
+        # Runs in the background, `set` does not wait for the directory walk
+        self._sweep_task = asyncio.create_task(self.sweep())
+
+    def _sweep(self) -> int:
+        deleted = 0
+        now = time.time()
+        for path in self._root.glob('*/*'):
+            if path.name.startswith('.'):
+                # Temporary file of an interrupted write
+                try:
+                    if now - path.stat().st_mtime > self._sweep_interval:
+                        deleted += self._remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    expires_at = float(f.readline())
+            except FileNotFoundError:
+                continue
+            except (ValueError, UnicodeDecodeError):
+                expires_at = now
+            if expires_at and now >= expires_at:
+                deleted += self._remove(path)
+        if deleted:
+            print(f"[FileStateStore] Deleted {deleted} expired entries from {self._root}")
+        return deleted
+
+    def _path(self, name: str) -> Path:
+        # Keys are arbitrary strings, file names are their hashes
+        key_hash = hashlib.sha256(name.encode('utf-8')).hexdigest()
+        return self._root / key_hash[:2] / key_hash
+
+    @staticmethod
+    def _read(path: Path) -> Optional[str]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                expires_at = float(f.readline())
+                if expires_at and time.time() >= expires_at:
+                    os.remove(path)
+                    return None
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: Path, value: str, ex: Optional[int]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(f"{time.time() + ex if ex else 0}\n")
+                f.write(value)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+
+def create_state_store(kind: str, root_dir: str = '.agent_state', redis_url: str | None = None) -> StateStore | None:
+    """
+    Create state store by kind: `memory`, `file`, `redis` (requires `redis` package) or `inline` (None - state is
+    stored in the assistant message as before).
+    """
+    if kind == INLINE_STATE:
+        return None
+    if kind == MEMORY_STATE_STORE:
+        return InMemoryStateStore()
+    if kind == FILE_STATE_STORE:
+        return FileStateStore(root_dir)
+    if kind == REDIS_STATE_STORE:
+        if redis is None:
+            raise ValueError("State store `redis` requires the `redis` package")
+        return redis.from_url(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown state store `{kind}`")
+
+
+class ConversationStateRepository:
+    """
+    Keeps tool call history on the server: the assistant message state carries only a reference (`STATE_REF_KEY`) to
+    the history stored in `store`. Keys are scoped by conversation and end with the content hash, so saving the same
+    history twice stores it once and a state can only reference histories of its own conversation.
+    States with inline history (e.g. saved before the store was enabled, or without conversation id) are still
+    supported.
+    """
+
+    def __init__(self, store: StateStore, ttl_seconds: Optional[int] = 30 * 24 * 3600, key_prefix: str = 'agent-state:'):
+        self._store = store
+        self._ttl_seconds = ttl_seconds
+        self._key_prefix = key_prefix
+
+    async def save(self, state: dict[str, Any], conversation_id: Optional[str]) -> dict[str, Any]:
+        """
+        Store tool call history of the state. Without conversation id the history is kept inline.
+
+        Returns:
+            State to set on the assistant message, tool call history replaced with the reference
+        """
+        tool_call_history = state.get(TOOL_CALL_HISTORY_KEY)
+        if not tool_call_history or not conversation_id:
+            return state
+
+        value = json.dumps(tool_call_history, ensure_ascii=False, separators=(',', ':'), default=str)
+        key = f"{self._conversation_prefix(conversation_id)}{hashlib.sha256(value.encode('utf-8')).hexdigest()}"
+        await self._store.set(key, value, ex=self._ttl_seconds)
+
+        compact_state = {name: item for name, item in state.items() if name != TOOL_CALL_HISTORY_KEY}
+        compact_state[STATE_REF_KEY] = key
+        return compact_state
+
+    async def load_histories(self, states: list[Any], conversation_id: Optional[str]) -> dict[str, list[dict[str, Any]]]:
+        """
+        Load tool call histories referenced by the states concurrently.
+
+        Returns:
+            Tool call history by reference. References of other conversations are ignored, missing (expired),
+            unreadable and corrupted ones are skipped
+        """
+        if not conversation_id:
+            return {}
+
+        conversation_prefix = self._conversation_prefix(conversation_id)
+        refs = {
+            state[STATE_REF_KEY] for state in states
+            if isinstance(state, dict) and isinstance(state.get(STATE_REF_KEY), str)
+        }
+        refs = [ref for ref in refs if ref.startswith(conversation_prefix)]
+        values = await asyncio.gather(*(self._store.get(ref) for ref in refs), return_exceptions=True)
+
+        histories = {}
+        for ref, value in zip(refs, values):
+            if isinstance(value, BaseException):
+                print(f"[ConversationStateRepository] Unable to load state {ref}, tool call history is skipped: {value}")
+                continue
+            if value is None:
+                print(f"[ConversationStateRepository] State {ref} is not found, tool call history is skipped")
+                continue
+            try:
+                history = json.loads(value)
+            except ValueError as e:
+                print(f"[ConversationStateRepository] State {ref} is corrupted, tool call history is skipped: {e}")
+                continue
+            if isinstance(history, list):
+                histories[ref] = history
+        return histories
+
+    def _conversation_prefix(self, conversation_id: str) -> str:
+        conversation_hash = hashlib.sha256(conversation_id.encode('utf-8')).hexdigest()
+        return f"{self._key_prefix}{conversation_hash}:"
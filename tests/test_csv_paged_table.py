@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("tabulate")
+
+from task.utils.csv_paged_table import CsvPagedTable
+
+
+def make_csv(row_count: int) -> bytes:
+    """Short rows first, then rows with long text, so the first rows do not represent the rest of the file."""
+    lines = ["id,name,amount,comment"]
+    for number in range(row_count):
+        comment = "ok" if number < row_count // 2 else "long comment text " * (number % 40 + 1)
+        lines.append(f'{number},"name {number}",{number * 1.25:.2f},"{comment}"')
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+
+def read_pages(table: CsvPagedTable) -> list[str]:
+    # Reading a page may move its overflow rows to a new last page, so `total_pages` is checked after every page
+    pages = []
+    while len(pages) < table.total_pages:
+        pages.append(table.page(len(pages) + 1))
+    return pages
+
+
+def page_rows(table: CsvPagedTable) -> list[str]:
+    # Markdown table lines after the header and the separator
+    return [line for page in read_pages(table) for line in page.splitlines()[2:]]
+
+
+def test_pages_fit_budget_on_skewed_data():
+    table = CsvPagedTable(make_csv(2_000), page_chars=3_000)
+
+    sizes = [len(page) for page in read_pages(table)]
+
+    assert table.total_rows == 2_000
+    assert max(sizes) <= 3_000
+    # Pages are filled up to the budget, not cut after a fixed number of rows
+    assert sum(sizes[:-1]) / (len(sizes) - 1) > 2_000
+
+
+def test_pages_contain_all_rows_in_order():
+    file_content = make_csv(500)
+    table = CsvPagedTable(file_content, page_chars=2_000)
+
+    full_table = pd.read_csv(io.BytesIO(file_content)).to_markdown(index=False)
+
+    assert [line.split('|')[1].strip() for line in page_rows(table)] == [str(number) for number in range(500)]
+    assert [line.split('|')[4].strip() for line in page_rows(table)] == [
+        line.split('|')[4].strip() for line in full_table.splitlines()[2:]
+    ]
+
+
+def test_row_larger_than_budget_gets_own_page():
+    file_content = b'id,text\n1,short\n2,"' + b"x" * 500 + b'"\n3,short\n'
+    table = CsvPagedTable(file_content, page_chars=200)
+
+    assert table.total_rows == 3
+    assert table.total_pages == 3
+    assert "x" * 500 in table.page(2)
+
+
+def test_overflow_rows_move_to_next_page():
+    # Values are rendered wider than in the file (`1e5` as `100000`), so the estimated page does not fit when rendered
+    file_content = ("v\n" + "1e5\n" * 100).encode('utf-8')
+    table = CsvPagedTable(file_content, page_chars=200)
+    estimated_pages = table.total_pages
+
+    pages = read_pages(table)
+
+    assert table.total_pages > estimated_pages
+    assert all(len(page) <= 200 for page in pages)
+    assert len(page_rows(table)) == 100
+
+
+def test_empty_table():
+    table = CsvPagedTable(b"a,b\n")
+
+    assert table.total_rows == 0
+    assert table.total_pages == 1
+    assert table.page(1) == pd.DataFrame(columns=["a", "b"]).to_markdown(index=False)
@@ -0,0 +1,156 @@
+import copy
+import time
+
+import pytest
+
+pytest.importorskip("aidial_sdk")
+
+from aidial_sdk.chat_completion import Attachment, CustomContent, Message, Role
+
+from task.utils.constants import CUSTOM_CONTENT, TOOL_CALL_HISTORY_KEY
+from task.utils.history import unpack_messages
+
+
+def unpack_messages_with_deep_copy(messages: list[Message], state_history: list[dict]) -> list[dict]:
+    """Implementation before the copy-free unpacking, kept as the reference."""
+    result = []
+    for message in messages:
+        if message.role == Role.ASSISTANT:
+            if custom_content := message.custom_content:
+                state = custom_content.state
+                if state and isinstance(state, dict):
+                    tool_call_history = state.get(TOOL_CALL_HISTORY_KEY)
+                    if tool_call_history and isinstance(tool_call_history, list):
+                        for history_msg in tool_call_history:
+                            if history_msg.get("role") == Role.TOOL.value:
+                                result.append(
+                                    {
+                                        "role": Role.TOOL.value,
+                                        "content": history_msg.get("content"),
+                                        "tool_call_id": history_msg.get("tool_call_id"),
+                                    }
+                                )
+                            else:
+                                result.append(history_msg)
+
+                    msg = copy.deepcopy(message)
+                    msg.custom_content = None
+                    result.append(msg.dict(exclude_none=True))
+        else:
+            attachments_urls_content = ''
+            if message.custom_content and message.custom_content.attachments:
+                attachments_urls_content = '\n\nAttached files URLs:\n'
+                for attachment in message.custom_content.attachments:
+                    if attachment.url:
+                        attachments_urls_content += f"{attachment.url}\n"
+                    elif attachment.reference_url:
+                        attachments_urls_content += f"{attachment.reference_url}\n"
+
+            content = message.content or ''
+            if attachments_urls_content:
+                content += attachments_urls_content
+
+            result.append({"role": message.role, "content": content})
+
+    if state_history:
+        for history_msg in state_history:
+            if history_msg.get(CUSTOM_CONTENT):
+                del history_msg[CUSTOM_CONTENT]
+            result.append(history_msg)
+
+    return result
+
+
+def make_conversation(turns: int, tool_calls: int = 1, result_chars: int = 0) -> list[Message]:
+    """Conversation where every assistant message keeps `tool_calls` tool calls and their results in its state."""
+    messages = [Message(role=Role.SYSTEM, content="You are a helpful assistant")]
+    for turn in range(turns):
+        messages.append(
+            Message(
+                role=Role.USER,
+                content=f"Question {turn}",
+                custom_content=CustomContent(
+                    attachments=[
+                        Attachment(url=f"files/bucket/report_{turn}.pdf", type="application/pdf"),
+                        Attachment(url=f"https://example.com/{turn}", type="text/html"),
+                    ]
+                ) if turn % 2 else None,
+            )
+        )
+        tool_call_history = []
+        for call in range(tool_calls):
+            call_id = f"call_{turn}" if tool_calls == 1 else f"call_{turn}_{call}"
+            tool_call = {"id": call_id, "type": "function", "function": {"name": "rag_search", "arguments": "{}"}}
+            tool_call_history.append({"role": Role.ASSISTANT.value, "content": "", "tool_calls": [tool_call]})
+            tool_call_history.append(
+                {
+                    "role": Role.TOOL.value,
+                    "name": "rag_search",
+                    "content": f"Result {turn}" + "x" * result_chars,
+                    "tool_call_id": call_id,
+                    CUSTOM_CONTENT: {"attachments": []},
+                }
+            )
+        messages.append(
+            Message(
+                role=Role.ASSISTANT,
+                content=f"Answer {turn}",
+                custom_content=CustomContent(state={TOOL_CALL_HISTORY_KEY: tool_call_history}),
+            )
+        )
+    messages.append(Message(role=Role.USER, content="Last question"))
+    return messages
+
+
+def make_state_history() -> list[dict]:
+    tool_call = {"id": "call_new", "type": "function", "function": {"name": "rag_search", "arguments": "{}"}}
+    return [
+        {"role": Role.ASSISTANT.value, "content": "", "tool_calls": [tool_call], CUSTOM_CONTENT: {"state": {"x": 1}}},
+        {"role": Role.TOOL.value, "content": "New result", "tool_call_id": "call_new", CUSTOM_CONTENT: {"attachments": []}},
+    ]
+
+
+def test_output_matches_deep_copy_implementation():
+    messages = make_conversation(20)
+    reference_messages = copy.deepcopy(messages)
+
+    result = unpack_messages(messages, make_state_history())
+    reference = unpack_messages_with_deep_copy(reference_messages, make_state_history())
+
+    assert result == reference
+
+
+def test_request_messages_are_not_modified():
+    messages = make_conversation(5)
+    original = copy.deepcopy(messages)
+
+    unpack_messages(messages, make_state_history())
+
+    assert messages == original
+
+
+def test_persisted_state_matches_deep_copy_implementation():
+    state_history = make_state_history()
+    reference_state_history = make_state_history()
+
+    unpack_messages(make_conversation(3), state_history)
+    unpack_messages_with_deep_copy(make_conversation(3), reference_state_history)
+
+    assert state_history == reference_state_history
+    assert not any(CUSTOM_CONTENT in msg for msg in state_history)
+
+
+def test_benchmark_against_deep_copy_implementation():
+    messages = make_conversation(500, tool_calls=3, result_chars=4_000)
+    reference_messages = copy.deepcopy(messages)
+
+    start = time.perf_counter()
+    result = unpack_messages(messages, make_state_history())
+    seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = unpack_messages_with_deep_copy(reference_messages, make_state_history())
+    reference_seconds = time.perf_counter() - start
+
+    print(f"500 turns, {len(result)} messages: unpack_messages {seconds * 1000:.1f} ms, "
+          f"deep copy {reference_seconds * 1000:.1f} ms")
+    assert result == reference
@@ -0,0 +1,85 @@
+import pytest
+
+BeautifulSoup = pytest.importorskip("bs4").BeautifulSoup
+
+from task.utils.html_text_extractor import (
+    HTML_PARSER_BACKEND,
+    SELECTOLAX_BACKEND,
+    HtmlTextExtractor,
+    available_backends,
+    benchmark_backends,
+)
+
+CORPUS = [
+    "<html><head><title>Report</title><style>body {margin: 0}</style></head><body><h1>Q3 results</h1>"
+    "<p>Revenue grew by <b>12%</b> to <i>$4.2M</i>.</p><script>track('view');</script></body></html>",
+    "<table><tr><th>Name</th><th>Value</th></tr><tr><td>alpha</td><td> 1 </td></tr></table>",
+    "<div>Unclosed <p>first<p>second<li>item</div></span>",
+    "<p>before</p><!-- hidden -->",
+    "<template><p>not rendered</p></template><p>rendered</p>",
+    "<p>caf&eacute; &amp; bar&nbsp;&#169; &lt;b&gt;</p>",
+    "<noscript>no js</noscript>",
+    "no markup at all",
+    "",
+]
+
+
+def extract_with_previous_path(html: str) -> str:
+    """Extraction used before the pluggable backends."""
+    soup = BeautifulSoup(html, features='html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    return soup.get_text(separator='\n', strip=True)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_available_backends_match_previous_extraction(backend):
+    extractor = HtmlTextExtractor(backend=backend)
+
+    for html in CORPUS:
+        assert extractor.extract(html) == extract_with_previous_path(html)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_misnested_markup_keeps_text(backend):
+    # Parsers recover from misnested inline tags differently, only the line breaks between text nodes may differ
+    html = "<p>pre<b>fix</b>ed and <b><i>badly</b> nested</i> text</p>"
+
+    assert HtmlTextExtractor(backend=backend).extract(html).split() == extract_with_previous_path(html).split()
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_cdata_and_textarea_are_removed(backend):
+    extractor = HtmlTextExtractor(backend=backend)
+
+    assert extractor.extract("<p><![CDATA[raw data]]> after</p>") == "after"
+    assert extractor.extract("<textarea>keep <b>tags</b></textarea><p>text</p>") == "text"
+
+
+def test_selectolax_is_selected_when_installed():
+    pytest.importorskip("selectolax")
+
+    assert available_backends()[0] == SELECTOLAX_BACKEND
+    assert HtmlTextExtractor().backend == SELECTOLAX_BACKEND
+
+
+def test_default_backend_is_verified():
+    assert HtmlTextExtractor().backend in available_backends()
+    assert HTML_PARSER_BACKEND in available_backends()
+
+
+def test_input_is_truncated():
+    extractor = HtmlTextExtractor(max_input_chars=10)
+
+    assert extractor.extract("<p>abcdefghijklmnop</p>") == "abcdefg"
+
+
+def test_benchmark_backends():
+    html = "".join(f"<div><p>Paragraph {i}</p><script>x = {i}</script></div>" for i in range(2000))
+
+    results = benchmark_backends(html, repeat=2)
+
+    for result in results:
+        print(f"{result.backend}: {result.avg_ms:.1f} ms, {result.mb_per_second:.2f} MB/s")
+        assert result.avg_ms > 0
+    assert HTML_PARSER_BACKEND in [result.backend for result in results]
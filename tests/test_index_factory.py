@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from task.tools.rag.document_cache import DocumentCache
+from task.tools.rag.index_factory import (
+    IndexConfig,
+    build_index,
+    format_quantization_report,
+    format_recall_report,
+    index_description,
+    quantization_report,
+    recall_report,
+)
+
+
+def make_embeddings(
+        count: int,
+        seed: int = 0,
+        dimension: int = 384,
+        latent_dimension: int = 32,
+        topics: int = 50,
+        spread: float = 0.5,
+) -> np.ndarray:
+    """
+    Normalized embeddings grouped around topics. Like sentence embeddings, they lie close to a low-dimensional
+    subspace, unlike uniform random vectors on which approximate search has no structure to exploit. Larger `spread`
+    makes topics overlap.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, latent_dimension))
+    latent = centers[rng.integers(0, topics, count)] + spread * rng.standard_normal((count, latent_dimension))
+    vectors = latent @ rng.standard_normal((latent_dimension, dimension))
+    vectors += 0.05 * np.sqrt(latent_dimension) * rng.standard_normal((count, dimension))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype('float32')
+
+
+def test_pq_is_used_only_with_enough_vectors():
+    config = IndexConfig(quantization="pq")
+
+    assert index_description(1_000, config) == "SQ8"
+    assert index_description(9_983, config) == "HNSW32,SQ8"
+    assert index_description(9_984, config) == "HNSW32,PQ48x8"
+
+
+def test_size_estimate_includes_pq_codebooks():
+    embeddings = make_embeddings(1_000)
+
+    index = build_index(embeddings, IndexConfig(), "PQ16x4")
+
+    assert DocumentCache._index_bytes(index) == pytest.approx(len(faiss.serialize_index(index)), rel=0.01)
+
+
+def test_quantization_report():
+    # 5-bit codebooks keep training fast, PQ is used from 39 * 2**5 = 1248 vectors
+    config = IndexConfig(pq_nbits=5)
+    embeddings = make_embeddings(1_600)
+
+    results = quantization_report(embeddings[:1_500], embeddings[1_500:], config)
+
+    print(format_quantization_report(results))
+    by_mode = {result.quantization: result for result in results}
+    assert by_mode["pq"].index_type == "PQ48x5"
+    assert by_mode["float16"].recall >= 0.95
+    assert by_mode["sq8"].recall >= 0.95
+    assert by_mode["pq"].recall >= 0.4
+    assert by_mode["pq"].index_bytes < by_mode["sq8"].index_bytes < by_mode["float32"].index_bytes
+
+
+def test_recall_report():
+    # Overlapping topics, harder for IVF than well separated clusters
+    embeddings = make_embeddings(20_200, latent_dimension=128, topics=200, spread=1.5)
+
+    results = recall_report(embeddings[:20_000], embeddings[20_000:], IndexConfig())
+
+    print(format_recall_report(results))
+    _, hnsw, ivf = results
+    assert hnsw.index_type == "HNSW32,Flat" and hnsw.recall >= 0.95
+    assert ivf.index_type.startswith("IVF") and ivf.recall >= 0.95
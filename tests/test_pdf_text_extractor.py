@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("pdfplumber")
+
+from task.utils.pdf_text_extractor import PdfTextExtractor, benchmark_extraction
+
+
+def make_pdf(page_texts: list[str]) -> bytes:
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    page_count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(page_count))
+        + b"] /Count %d >>" % page_count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for position, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode('latin-1') + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (5 + 2 * position)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return pdf
+
+
+PAGE_TEXTS = [f"Page {number} of the manual" for number in range(1, 41)]
+
+
+def test_sequential_extraction():
+    pages = PdfTextExtractor().extract_pages(make_pdf(PAGE_TEXTS))
+
+    assert pages == PAGE_TEXTS
+
+
+def test_parallel_extraction_matches_sequential():
+    file_content = make_pdf(PAGE_TEXTS)
+    extractor = PdfTextExtractor(workers=2, pages_per_task=8)
+    try:
+        parallel_pages = extractor.extract_pages(file_content)
+    finally:
+        extractor.shutdown()
+
+    assert parallel_pages == PdfTextExtractor().extract_pages(file_content)
+
+
+def test_benchmark_parallel_vs_sequential():
+    file_content = make_pdf([f"Line {number} " * 20 for number in range(300)])
+
+    results = benchmark_extraction(file_content, workers=(0, 2), repeat=1)
+
+    for result in results:
+        print(f"{result.workers} workers: {result.avg_ms:.1f} ms, {result.pages_per_second:.1f} pages/s")
+        assert result.pages_per_second > 0
+    assert [result.workers for result in results] == [0, 2]
@@ -0,0 +1,65 @@
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from task.tools.rag.text_splitter import RecursiveTextSplitter
+
+MANUAL_PATH = Path(__file__).parent / "microwave_manual.txt"
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    pieces = ["word", "longerword", " ", " ", "\n", "\n\n", ". ", "x" * 30, "  "]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+def test_chunks_respect_size():
+    text = MANUAL_PATH.read_text(encoding='utf-8')
+
+    chunks = RecursiveTextSplitter(chunk_size=500, chunk_overlap=50, separators=SEPARATORS).split_text(text)
+
+    assert chunks
+    assert all(0 < len(chunk) <= 500 for chunk in chunks)
+
+
+def test_overlap_larger_than_chunk_size_is_rejected():
+    with pytest.raises(ValueError):
+        RecursiveTextSplitter(chunk_size=10, chunk_overlap=20)
+
+
+def test_matches_langchain_splitter():
+    text_splitters = pytest.importorskip("langchain_text_splitters")
+    rng = random.Random(0)
+    texts = [MANUAL_PATH.read_text(encoding='utf-8')] + [random_text(rng, rng.randint(0, 400)) for _ in range(300)]
+
+    for chunk_size, chunk_overlap in [(500, 50), (100, 0), (40, 10), (7, 3)]:
+        splitter = RecursiveTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS)
+        reference = text_splitters.RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS, length_function=len,
+        )
+        for text in texts:
+            assert splitter.split_text(text) == reference.split_text(text)
+
+
+def test_benchmark_against_langchain_splitter():
+    text_splitters = pytest.importorskip("langchain_text_splitters")
+    text = MANUAL_PATH.read_text(encoding='utf-8') * 50
+    splitter = RecursiveTextSplitter(chunk_size=500, chunk_overlap=50, separators=SEPARATORS)
+    reference = text_splitters.RecursiveCharacterTextSplitter(
+        chunk_size=500, chunk_overlap=50, separators=SEPARATORS, length_function=len,
+    )
+
+    start = time.perf_counter()
+    chunks = splitter.split_text(text)
+    splitter_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reference_chunks = reference.split_text(text)
+    reference_seconds = time.perf_counter() - start
+
+    print(
+        f"{len(text) / 1e6:.1f} MB: RecursiveTextSplitter {splitter_seconds:.3f}s, "
+        f"langchain {reference_seconds:.3f}s"
+    )
+    assert chunks == reference_chunks